@@ -4,6 +4,7 @@ from app.domains.school.apis.tenant import tenant_management_router
 from app.domains.auth.apis.users_router import user_router
 from app.domains.auth.apis.role import role_router
 from app.domains.auth.apis.permission import permission_router
+from app.apis.internal_router import internal_router
 from app.config.tenant_dependencies import require_global_context
 
 global_router = APIRouter(dependencies=[Depends(require_global_context)])
@@ -12,3 +13,4 @@ global_router.include_router(tenant_management_router, prefix="/tenants", tags=[
 global_router.include_router(user_router, prefix="/users", tags=["Users"])
 global_router.include_router(role_router, prefix="/roles", tags=["Roles"])
 global_router.include_router(permission_router, prefix="/permissions", tags=["Permissions"])
+global_router.include_router(internal_router, prefix="/internal", tags=["Internal"], include_in_schema=False)
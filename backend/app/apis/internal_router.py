@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.db.redis import revocation_filter
+from app.db.session import collect_db_stats
+from app.utils.auth_dep import SuperuserRequired
+from app.utils.security import password_hasher, verified_claims
+from app.utils.tenant_relocation import relocations, start_relocation
+
+internal_router = APIRouter(dependencies=[Depends(SuperuserRequired)])
+
+
+@internal_router.get("/db-stats")
+async def get_db_stats():
+    """Pool occupancy, checkout wait and connect latency for every live engine."""
+    return collect_db_stats()
+
+
+@internal_router.get("/auth-stats")
+async def get_auth_stats():
+    """Verified-claims cache and revocation filter hit rates, password hashing queue."""
+    return {
+        "verified_claims": verified_claims.stats(),
+        "revocation_filter": revocation_filter.stats(),
+        "password_hashing": password_hasher.stats(),
+    }
+
+
+@internal_router.post("/tenants/{subdomain}/relocate")
+async def relocate_tenant(subdomain: str, target_shard: str):
+    """Start moving a tenant to another shard; poll /internal/relocations for progress."""
+    try:
+        progress = await start_relocation(subdomain, target_shard)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return progress.snapshot()
+
+
+@internal_router.get("/relocations")
+async def get_relocations():
+    return [progress.snapshot() for progress in relocations.values()]
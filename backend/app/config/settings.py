@@ -41,12 +41,25 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRY: int = 3600  # 1 hour
     REFRESH_TOKEN_EXPIRY: int = 86400  # 24 hours
     JTI_EXPIRY: int = 3600
+    TOKEN_CLAIMS_CACHE_SIZE: int = 10000  # verified tokens kept in-process; 0 disables the cache
+    TOKEN_CLAIMS_CACHE_TTL: int = 300  # upper bound in seconds, entries never outlive the token's exp
+    TOKEN_BLOCKLIST_PARTITIONS_AHEAD: int = 2  # daily blocklist partitions kept beyond the longest token lifetime
+    TOKEN_BLOCKLIST_MAINTENANCE_INTERVAL: int = 3600  # seconds between partition create/drop runs
+    # bcrypt cost (log2 of iterations). Hashes made at another cost are re-hashed
+    # on the user's next login; python -m app.utils.calibrate_password_hash suggests one.
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # threads running bcrypt; keep below the worker's CPU count
+    PASSWORD_HASH_MAX_PENDING: int = 64  # hashes allowed to wait for a thread before new ones are refused
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 2.0  # seconds to wait for a pending slot before answering 503
 
     # --- Multi-Tenancy Specific Settings ---
     DEFAULT_TENANT_SCHEMA_PREFIX: str = "tenant_"
     TENANT_COOKIE_NAME: str = "X-Tenant-ID"
     TENANT_HEADER_NAME: str = "X-Tenant-ID"
     TENANT_SUBDOMAIN_PARTS: int = 1  # tenant1.domain.com
+    TENANT_CACHE_TTL: int = 60  # seconds a resolved tenant stays cached in-process
+    TENANT_CACHE_NEGATIVE_TTL: int = 10  # seconds an unknown subdomain stays cached
+    TENANT_CACHE_MAX_SIZE: int = 10000
 
     # --- Database Settings ---
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
@@ -54,8 +67,59 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "edutenant_db")
     POSTGRES_SERVER: str = os.getenv("POSTGRES_SERVER", "postgres" if DOCKER else "localhost")
     POSTGRES_PORT: int = int(os.getenv("POSTGRES_PORT", 5432))
+    DB_USE_POOL: bool = True  # False falls back to NullPool (one connection per checkout)
     DB_POOL_SIZE: int = 5
     DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    TENANT_DB_POOL_SIZE: int = 2  # per tenant engine; keep small, there is one engine per schema
+    TENANT_DB_MAX_OVERFLOW: int = 3
+    # "per_tenant": one engine (and pool) per schema, search_path fixed at connect.
+    # "shared": one pool for every tenant, search_path set per transaction.
+    # "translate": one pool for every tenant, schema applied via schema_translate_map.
+    TENANT_ENGINE_MODE: Literal["per_tenant", "shared", "translate"] = "per_tenant"
+    # Set when a transaction-mode pooler (PgBouncer) sits in front of Postgres:
+    # no named prepared statements and no session-level search_path.
+    DB_PGBOUNCER: bool = False
+    # Prepared statements kept per connection (ignored with DB_PGBOUNCER). Shared-mode
+    # and replica connections cache each tenant's statements separately, so size it
+    # for busy tenants x hot statements.
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    SHARED_TENANT_DB_POOL_SIZE: int = 20
+    SHARED_TENANT_DB_MAX_OVERFLOW: int = 10
+    TENANT_ENGINE_CACHE_SIZE: int = 100
+    TENANT_ENGINE_IDLE_TIMEOUT: int = 600  # seconds before an unused engine is disposed
+    TENANT_ENGINE_DISPOSE_GRACE: int = 30  # seconds an evicted engine waits for checked-out connections
+    TENANT_ENGINE_SWEEP_INTERVAL: int = 60
+    # async_sessionmaker overrides per billing tier, e.g. {"premium": {"autoflush": true}}
+    TENANT_SESSION_OPTIONS_BY_TIER: dict[str, dict[str, Any]] = {}
+    # Read replicas (asyncpg DSNs); empty means reads go to the primary
+    READ_REPLICA_URLS: list[str] = []
+    READ_PRIMARY_COOKIE_NAME: str = "read_primary"
+    READ_PRIMARY_STICKY_SECONDS: int = 5  # reads stay on the primary this long after a write
+    # Concurrent requests (and per-tenant engine connections) allowed per tenant, by billing tier
+    TENANT_MAX_CONCURRENCY_BY_TIER: dict[str, int] = {"basic": 2, "premium": 10}
+    TENANT_DEFAULT_MAX_CONCURRENCY: int = 2
+    TENANT_QUOTA_WAIT_TIMEOUT: float = 5.0  # seconds a request queues for a slot before a 503
+    # Per-request database deadline, applied as SET LOCAL statement_timeout (0 disables)
+    DEFAULT_STATEMENT_TIMEOUT_MS: int = 10000
+    STATEMENT_TIMEOUT_MS_BY_TIER: dict[str, int] = {"basic": 5000, "premium": 30000}
+    TENANT_PROVISIONING_TIMEOUT_MS: int = 60000  # creating a tenant builds its whole schema
+    # Extra tenant databases, shard id -> asyncpg DSN. The "default" shard is
+    # SHARED_DB_URL; new tenants go to whichever shard has the fewest tenants.
+    TENANT_SHARD_URLS: dict[str, str] = {}
+    # Dedicated databases, referenced by tenants.database_ref -> asyncpg DSN.
+    # Credentials stay in configuration; public.tenants only holds the reference.
+    TENANT_DATABASE_URLS: dict[str, str] = {}
+    # Online tenant relocation between shards
+    TENANT_RELOCATION_CATCHUP_ROWS: int = 500  # freeze once a catch-up pass sees fewer changed rows
+    TENANT_RELOCATION_MAX_CATCHUP_PASSES: int = 5
+    TENANT_RELOCATION_LOCK_TIMEOUT_MS: int = 5000  # give up on the write freeze after this long
+    # Startup warm-up of the most recently active tenants (engines, a connection, hot statements)
+    TENANT_WARMUP_ENABLED: bool = False
+    TENANT_WARMUP_LIMIT: int = 20
+    TENANT_WARMUP_CONCURRENCY: int = 4
+    TENANT_WARMUP_TIMEOUT: float = 15.0  # seconds for the whole phase; startup never waits longer
 
     #  --- Default Tenant and admin ---
     INIT_DEFAULT_TENANT: bool = os.getenv("INIT_DEFAULT_TENANT", "false").lower() == "true"
@@ -76,6 +140,11 @@ class Settings(BaseSettings):
     REDIS_NODE: str = "0"
     REDIS_MAX_RETRIES: int = 3
     REDIS_RETRY_INTERVAL: int = 10
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # seconds; a slow Redis fails over to Postgres instead of stalling auth
+    REDIS_CONNECT_TIMEOUT: float = 1.0
+    TOKEN_BLOCKLIST_FILTER_MAX_SIZE: int = 100000  # revocations mirrored in-process; beyond this every check asks Redis
+    TOKEN_BLOCKLIST_PURGE_INTERVAL: int = 60  # seconds between sweeps of expired revocations
+    TOKEN_BLOCKLIST_RESCAN_MAX_INTERVAL: int = 3600  # longest wait between rescans while the filter is too small
 
     # --- Email Settings ---
     SMTP_TLS: bool = True
@@ -0,0 +1,48 @@
+# app/config/tenant_context.py
+from dataclasses import dataclass
+from typing import Literal, Optional
+from uuid import UUID
+
+from fastapi import Request
+
+from app.db.tenant_directory import TenantRecord
+
+
+@dataclass(frozen=True)
+class TenantContext:
+    """
+    Tenant resolution result for one request.
+
+    Filled once by TenantSubdomainMiddleware and stored on
+    ``request.state.tenant_context`` so dependencies and services never
+    have to look the tenant up again.
+    """
+
+    context: Literal["global", "tenant"]
+    subdomain: Optional[str] = None
+    tenant: Optional[TenantRecord] = None
+
+    @property
+    def is_tenant(self) -> bool:
+        return self.context == "tenant"
+
+    @property
+    def tenant_id(self) -> Optional[UUID]:
+        return self.tenant.id if self.tenant else None
+
+    @property
+    def schema_name(self) -> Optional[str]:
+        return self.tenant.schema_name if self.tenant else None
+
+    @property
+    def billing_tier(self) -> Optional[str]:
+        return self.tenant.billing_tier if self.tenant else None
+
+    @property
+    def shard_id(self) -> Optional[str]:
+        return self.tenant.effective_shard if self.tenant else None
+
+
+def get_tenant_context(request: Request) -> Optional[TenantContext]:
+    """Return the context set by the middleware, or None outside of it."""
+    return getattr(request.state, "tenant_context", None)
@@ -1,17 +1,21 @@
 # app/config/tenant_dependencies.py
-from app.domains.school.models.tenant import Tenant
 from fastapi import Request, HTTPException, Depends
 from typing import Optional
 from uuid import UUID
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.db.session import get_tenant_session, get_master_session
+from app.db.session import get_tenant_session, tenant_directory
+from app.config.tenant_context import get_tenant_context
+from app.utils.dependencies import context_session
 from app.domains.school.services.tenant import TenantService
-from app.domains.school.repository.tenant import TenantRepository
-from sqlmodel import Session, select
+from sqlmodel import Session
 
 
 async def get_tenant_id(request: Request) -> UUID:
     """Resolve tenant UUID from subdomain or header with proper database lookup"""
+    ctx = get_tenant_context(request)
+    if ctx is not None and ctx.tenant_id is not None:
+        return ctx.tenant_id
+
     tenant_identifier = None
     
     
@@ -25,39 +29,23 @@ async def get_tenant_id(request: Request) -> UUID:
     if not tenant_identifier:
         raise HTTPException(status_code=400, detail="Tenant not specified")
 
-    
-    async with get_master_session() as session:
-        tenant_repo = TenantRepository(session)
+    try:
+        tenant = await tenant_directory.resolve(tenant_identifier)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to resolve tenant: {str(e)}"
+        )
+
+    if not tenant:
+        raise HTTPException(status_code=404, detail="Tenant not found")
 
-        try:
-            
-            try:
-                tenant_uuid = UUID(tenant_identifier)
-                tenant = await tenant_repo.get(Tenant, tenant_uuid)
-                if tenant:
-                    return tenant.id
-            except ValueError:
-                pass  
-            
-            stmt = select(Tenant).where(Tenant.subdomain == tenant_identifier)
-            result = await session.execute(stmt)
-            tenant = result.scalars().first()
-            
-            if tenant:
-                return tenant.id
-            
-            raise HTTPException(status_code=404, detail="Tenant not found")
-            
-        except Exception as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to resolve tenant: {str(e)}"
-            )
+    return tenant.id
 
-async def get_tenant_session(tenant_id: UUID = Depends(get_tenant_id)) -> AsyncSession:
-    """Get tenant-specific database session using resolved UUID"""
+async def get_tenant_session(request: Request, tenant_id: UUID = Depends(get_tenant_id)) -> AsyncSession:
+    """Get the request's tenant session once the tenant has been resolved"""
     try:
-        async with get_tenant_session(str(tenant_id)) as session:
+        async with context_session(request) as session:
             yield session
     except Exception as e:
         raise HTTPException(
@@ -73,3 +61,10 @@ def require_global_context(request: Request):
 def require_tenant_context(request: Request):
     if getattr(request.state, "context", None) != "tenant":
         raise HTTPException(status_code=403, detail="Only accessible from tenant context")
+
+
+def require_tenant_path(request: Request, tenant: str):
+    """Tenant routes live under /tenants/{tenant}; the segment must match the host."""
+    ctx = get_tenant_context(request)
+    if ctx is None or not ctx.is_tenant or ctx.subdomain != tenant.lower():
+        raise HTTPException(status_code=404, detail="Tenant not found")
@@ -34,7 +34,9 @@ class APIBase(Base):  # `table=True` makes it a table model in SQLModel
         default_factory=datetime.now, nullable=False
     )
     updated_date: Optional[datetime] = Field(
-        default_factory=datetime.now, nullable=False
+        default_factory=datetime.now,
+        nullable=False,
+        sa_column_kwargs={"onupdate": datetime.now},
     )
 
 
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# How often a retired engine's pool is checked for returned connections
+DISPOSE_POLL_INTERVAL = 0.1
+
+
+class TenantEngineRegistry:
+    """
+    Bounded LRU cache of tenant engines with idle-time eviction.
+
+    Engine creation never awaits, so two coroutines resolving the same new
+    tenant cannot interleave inside get_or_create and build two engines; the
+    lock only guards callers running in worker threads. Evicted engines are
+    disposed outside the lock, after on_evict has been told about their keys,
+    and not while a request still has one of their connections checked out:
+    those wait until the pool is back to zero or ``dispose_grace`` seconds
+    have passed.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        idle_timeout: float,
+        on_evict: Optional[Callable[[str], None]] = None,
+        dispose_grace: float = 30.0,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self.dispose_grace = dispose_grace
+        self._engines: "OrderedDict[str, AsyncEngine]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._tags: Dict[str, Hashable] = {}
+        self._lock = threading.Lock()
+        self._pending_dispose: List[AsyncEngine] = []
+        self._dispose_tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._engines
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def get_or_create(
+        self,
+        key: str,
+        factory: Callable[[], AsyncEngine],
+        tag: Optional[Hashable] = None,
+    ) -> AsyncEngine:
+        """
+        Cached engine for ``key``. ``tag`` records what the engine was built
+        for (e.g. its shard); a cached engine built under another tag is
+        replaced and disposed.
+        """
+        evicted: Dict[str, AsyncEngine] = {}
+
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None and self._tags.get(key) != tag:
+                evicted[key] = self._engines.pop(key)
+                self._last_used.pop(key, None)
+                engine = None
+                logger.info(f"Replaced stale tenant engine: {key}")
+
+            if engine is not None:
+                self._engines.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                engine = factory()
+                self._engines[key] = engine
+                self._tags[key] = tag
+                while len(self._engines) > self.max_size:
+                    old_key, old_engine = self._engines.popitem(last=False)
+                    self._last_used.pop(old_key, None)
+                    self._tags.pop(old_key, None)
+                    evicted[old_key] = old_engine
+                    self.evictions += 1
+                    logger.info(f"Evicted tenant engine (LRU): {old_key}")
+            self._last_used[key] = time.monotonic()
+
+        if evicted:
+            self._notify_evicted(evicted)
+            self._schedule_dispose(list(evicted.values()))
+        return engine
+
+    def items(self):
+        return list(self._engines.items())
+
+    def values(self) -> List[AsyncEngine]:
+        return list(self._engines.values())
+
+    async def pop(self, key: str) -> bool:
+        """Remove and dispose a single engine. Returns False if it was not cached."""
+        with self._lock:
+            engine = self._engines.pop(key, None)
+            self._last_used.pop(key, None)
+            self._tags.pop(key, None)
+
+        if engine is None:
+            return False
+        self._notify_evicted({key: engine})
+        await self._dispose([engine])
+        return True
+
+    async def evict_idle(self) -> int:
+        """Dispose engines unused for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        evicted: Dict[str, AsyncEngine] = {}
+
+        with self._lock:
+            for key in [k for k, ts in self._last_used.items() if ts < cutoff]:
+                evicted[key] = self._engines.pop(key)
+                del self._last_used[key]
+                self._tags.pop(key, None)
+                self.evictions += 1
+                logger.info(f"Evicted tenant engine (idle): {key}")
+            pending = self._pending_dispose
+            self._pending_dispose = []
+
+        self._notify_evicted(evicted)
+        await self._dispose(list(evicted.values()) + pending)
+        return len(evicted)
+
+    async def run_idle_sweeper(self, interval: float) -> None:
+        """Background loop for the application lifespan; cancel to stop."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception:
+                logger.exception("Tenant engine idle sweep failed")
+
+    async def clear(self) -> None:
+        """Dispose every engine now, in use or not (shutdown, tests)."""
+        with self._lock:
+            evicted = dict(self._engines)
+            pending = self._pending_dispose
+            self._engines.clear()
+            self._last_used.clear()
+            self._tags.clear()
+            self._pending_dispose = []
+
+        self._notify_evicted(evicted)
+        for engine in list(evicted.values()) + pending:
+            await engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._engines),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _notify_evicted(self, evicted: Dict[str, AsyncEngine]) -> None:
+        if self.on_evict is None:
+            return
+        for key in evicted:
+            self.on_evict(key)
+
+    async def _dispose(self, engines: List[AsyncEngine]) -> None:
+        """Dispose engines nobody is using now; the rest once their requests are done."""
+        busy = []
+        for engine in engines:
+            if _checked_out(engine):
+                busy.append(engine)
+            else:
+                await engine.dispose()
+        if busy:
+            self._schedule_dispose(busy)
+
+    def _schedule_dispose(self, engines: List[AsyncEngine]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop in this thread: the next sweep picks them up.
+            with self._lock:
+                self._pending_dispose.extend(engines)
+            return
+
+        for engine in engines:
+            task = loop.create_task(self._dispose_when_returned(engine))
+            self._dispose_tasks.add(task)
+            task.add_done_callback(self._dispose_tasks.discard)
+
+    async def _dispose_when_returned(self, engine: AsyncEngine) -> None:
+        # dispose() would leave checked-out connections to the requests holding
+        # them, and a request still using the engine would then start a new pool
+        deadline = time.monotonic() + self.dispose_grace
+        while _checked_out(engine) and time.monotonic() < deadline:
+            await asyncio.sleep(DISPOSE_POLL_INTERVAL)
+        still_out = _checked_out(engine)
+        if still_out:
+            logger.warning(f"Disposing evicted engine with {still_out} connection(s) still checked out")
+        await engine.dispose()
+
+
+def _checked_out(engine: AsyncEngine) -> int:
+    # NullPool keeps no count: its connections close as soon as they are returned
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
@@ -0,0 +1,42 @@
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class LazySession:
+    """
+    Stand-in for an AsyncSession that only creates the real session on first use.
+
+    Attribute access is forwarded to the underlying session, so repositories
+    can take a LazySession wherever they expect an AsyncSession. Requests that
+    never touch the database never build a session at all.
+    """
+
+    def __init__(self, factory: Callable[[], AsyncSession]):
+        self._factory = factory
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name: str):
+        return getattr(self.session, name)
+
+    async def aclose(self, rollback: bool = False) -> None:
+        """Close the session if it was ever opened, rolling back on request."""
+        if self._session is None:
+            return
+
+        session, self._session = self._session, None
+        try:
+            if rollback:
+                await session.rollback()
+        finally:
+            await session.close()
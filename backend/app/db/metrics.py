@@ -0,0 +1,120 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds in seconds; anything slower lands in "+Inf"
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Bucketed latency histogram; each bucket counts only its own range."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b}" for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "sum": round(self.total, 6),
+        }
+
+
+class EngineMetrics:
+    """Counters for one engine, or one family of engines (all per-tenant engines)."""
+
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.connect_latency = Histogram()
+        self.connects = 0
+        self.search_path_resets = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "connects": self.connects,
+            "search_path_resets": self.search_path_resets,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+            "connect_latency_seconds": self.connect_latency.snapshot(),
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    metrics: Optional[EngineMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.checkout_wait.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep reporting to the same place
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+engine_metrics: Dict[str, EngineMetrics] = {}
+# Queries cancelled by statement_timeout, by tenant subdomain ("global" for the master DB)
+statement_timeouts: Dict[str, int] = {}
+_metrics_by_engine: "WeakKeyDictionary[Engine, EngineMetrics]" = WeakKeyDictionary()
+
+
+def instrument_engine(engine: AsyncEngine, label: str) -> EngineMetrics:
+    """Attach connect/checkout instrumentation, aggregated under ``label``."""
+    metrics = engine_metrics.setdefault(label, EngineMetrics())
+    sync_engine = engine.sync_engine
+    _metrics_by_engine[sync_engine] = metrics
+
+    if isinstance(sync_engine.pool, InstrumentedAsyncQueuePool):
+        sync_engine.pool.metrics = metrics
+
+    @event.listens_for(sync_engine, "do_connect")
+    def connect_started(dialect, conn_rec, cargs, cparams):
+        conn_rec.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "connect")
+    def connect_finished(dbapi_connection, connection_record):
+        started = connection_record.info.pop("connect_started", None)
+        metrics.connects += 1
+        if started is not None:
+            metrics.connect_latency.observe(time.perf_counter() - started)
+
+    return metrics
+
+
+def metrics_for(engine: Engine) -> Optional[EngineMetrics]:
+    return _metrics_by_engine.get(engine)
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.sync_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__, "status": pool.status()}
+
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
@@ -1,11 +1,27 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
 import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+from redis.exceptions import RedisError
+
 from app.config.settings import settings
+from app.db.revocation_filter import RevocationFilter
 
-redis_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0"
+logger = logging.getLogger(__name__)
 
-# Create the async Redis client from URL (preferred)
+# Create the async Redis client from URL (preferred). Short timeouts and no
+# client-side retries: callers fall back to Postgres rather than wait.
 token_blocklist = redis.Redis.from_url(
-    redis_url, decode_responses=True
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    retry=Retry(NoBackoff(), 0),
 )
 
 # If you're using host/port instead of URL, use this:
@@ -16,10 +32,191 @@ token_blocklist = redis.Redis.from_url(
 #     decode_responses=True
 # )
 
-async def add_jti_to_blocklist(jti: str) -> None:
-    """Add a JWT ID to the blocklist with expiration."""
-    await token_blocklist.set(name=jti, value="", ex=settings.JTI_EXPIRY)
+BLOCKLIST_PREFIX = "blocklist:"
+REVOCATION_CHANNEL = "token-revocations"
+SCAN_BATCH_SIZE = 500
+
+revocation_filter = RevocationFilter(max_size=settings.TOKEN_BLOCKLIST_FILTER_MAX_SIZE)
+
+# (jti, tenant, expires_at) for every unexpired revocation in Postgres
+Revocation = Tuple[str, Optional[str], datetime]
+RevocationLoader = Callable[[], Awaitable[Iterable[Revocation]]]
+
+
+def blocklist_key(jti: str, tenant: str | None = None) -> str:
+    """Revocations are scoped like the tokens: per tenant, or global for superusers."""
+    return f"{BLOCKLIST_PREFIX}{tenant or 'global'}:{jti}"
+
+
+async def add_jti_to_blocklist(
+    jti: str, tenant: str | None = None, expires_at: Optional[datetime] = None
+) -> None:
+    """Blocklist a JWT ID until the token would have expired anyway, and tell other processes."""
+    exp = expires_at.timestamp() if expires_at else time.time() + settings.JTI_EXPIRY
+    key = blocklist_key(jti, tenant)
+
+    await token_blocklist.set(name=key, value=str(exp), ex=max(1, int(exp - time.time()) + 1))
+    revocation_filter.add(key, exp)
+    await token_blocklist.publish(REVOCATION_CHANNEL, f"{exp} {key}")
+
+
+async def token_in_blocklist(jti: str, tenant: str | None = None) -> bool:
+    """Check if the JWT ID is in the blocklist, locally when the filter is in sync."""
+    key = blocklist_key(jti, tenant)
+    revoked = revocation_filter.revoked(key)
+    if revoked is not None:
+        return revoked
+    return await token_blocklist.exists(key) > 0
+
+
+async def backfill_blocklist(revocations: Iterable[Revocation]) -> int:
+    """
+    Write revocations Redis is missing (SET NX) and announce them to other
+    processes; returns how many were added.
+    """
+    now = time.time()
+    keys, expiries = [], []
+    pipe = token_blocklist.pipeline(transaction=False)
+    for jti, tenant, expires_at in revocations:
+        exp = expires_at.timestamp()
+        if exp <= now:
+            continue
+        key = blocklist_key(jti, tenant)
+        pipe.set(name=key, value=str(exp), ex=max(1, int(exp - now) + 1), nx=True)
+        keys.append(key)
+        expiries.append(exp)
+
+    if not keys:
+        return 0
+
+    added = 0
+    results = await pipe.execute()
+    for key, exp, was_set in zip(keys, expiries, results):
+        if was_set:
+            revocation_filter.add(key, exp)
+            await token_blocklist.publish(REVOCATION_CHANNEL, f"{exp} {key}")
+            added += 1
+    return added
+
+
+async def run_revocation_sync(purge_interval: float, load_revocations: RevocationLoader) -> None:
+    """
+    Keep Redis and revocation_filter in step with Postgres until cancelled.
+
+    Subscribes before scanning so nothing published during the scan is
+    lost, and drops the filter back to "ask Redis" whenever the
+    subscription breaks. Revocations from ``load_revocations`` (Postgres)
+    are backfilled into Redis on every (re)subscribe, and again whenever a
+    failed Redis call has marked it behind.
+
+    When there are more live revocations than the filter may hold, the loop
+    stays subscribed with the filter in "ask Redis" mode and rescans with
+    exponential backoff (from ``purge_interval`` up to
+    TOKEN_BLOCKLIST_RESCAN_MAX_INTERVAL), as each attempt is a full SCAN.
+    """
+    while True:
+        pubsub = token_blocklist.pubsub()
+        try:
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            await _backfill(load_revocations)
+
+            rescan_backoff = purge_interval
+            next_scan = last_purge = time.monotonic()
+            while True:
+                if not revocation_filter.ready and time.monotonic() >= next_scan:
+                    if await _load_revocations():
+                        await _drain(pubsub)
+                        revocation_filter.ready = True
+                        rescan_backoff = purge_interval
+                        logger.info(f"Token revocation filter in sync ({revocation_filter.stats()['size']} entries)")
+                    else:
+                        next_scan = time.monotonic() + rescan_backoff
+                        rescan_backoff = min(rescan_backoff * 2, settings.TOKEN_BLOCKLIST_RESCAN_MAX_INTERVAL)
+
+                message = await pubsub.get_message(timeout=purge_interval)
+                # Not ready: Redis answers, and the next scan picks this up
+                if message is not None and revocation_filter.ready:
+                    _apply(message)
+                if time.monotonic() - last_purge >= purge_interval:
+                    revocation_filter.purge()
+                    if revocation_filter.redis_behind:
+                        await _backfill(load_revocations)
+                    last_purge = time.monotonic()
+        except (RedisError, OSError) as e:
+            revocation_filter.mark_redis_behind()
+            logger.warning(f"Token revocation sync lost, checking Postgres per request: {e}")
+        finally:
+            revocation_filter.reset()
+            try:
+                await pubsub.aclose()
+            except (RedisError, OSError):
+                pass
+
+        await asyncio.sleep(settings.REDIS_RETRY_INTERVAL)
+
+
+async def _backfill(load_revocations: RevocationLoader) -> None:
+    mark = revocation_filter.behind_mark()
+    try:
+        revocations = await load_revocations()
+    except Exception as e:
+        # Postgres is unavailable too; Redis stays marked behind if it was
+        logger.warning(f"Could not load revocations for the Redis backfill: {e}")
+        return
+
+    added = await backfill_blocklist(revocations)
+    if added:
+        logger.info(f"Backfilled {added} revocation(s) from Postgres into Redis")
+    revocation_filter.clear_redis_behind(mark)
+
+
+async def _load_revocations() -> bool:
+    """Fill the filter from Redis; False if there are more revocations than it may hold."""
+    revocation_filter.reset()
+    loaded = 0
+    batch: List[str] = []
+
+    async for key in token_blocklist.scan_iter(match=f"{BLOCKLIST_PREFIX}*", count=SCAN_BATCH_SIZE):
+        batch.append(key)
+        if len(batch) >= SCAN_BATCH_SIZE:
+            loaded += await _load_batch(batch)
+            batch = []
+    if batch:
+        loaded += await _load_batch(batch)
+
+    if loaded > revocation_filter.max_size:
+        revocation_filter.reset()
+        logger.warning(f"{loaded} live revocations exceed TOKEN_BLOCKLIST_FILTER_MAX_SIZE")
+        return False
+    return True
+
+
+async def _load_batch(keys: List[str]) -> int:
+    values = await token_blocklist.mget(keys)
+    loaded = 0
+    for key, value in zip(keys, values):
+        if value is None:  # expired between SCAN and MGET
+            continue
+        revocation_filter.add(key, _expiry(value))
+        loaded += 1
+    return loaded
+
+
+async def _drain(pubsub) -> None:
+    while (message := await pubsub.get_message(timeout=0)) is not None:
+        _apply(message)
+
+
+def _apply(message: dict) -> None:
+    if message.get("type") != "message":
+        return
+    exp, _, key = message["data"].partition(" ")
+    revocation_filter.add(key, _expiry(exp))
+
 
-async def token_in_blocklist(jti: str) -> bool:
-    """Check if the JWT ID is in the blocklist."""
-    return await token_blocklist.exists(jti) > 0
+def _expiry(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        # Entry without an expiry stamp; Redis drops it within JTI_EXPIRY
+        return time.time() + settings.JTI_EXPIRY
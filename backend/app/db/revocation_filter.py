@@ -0,0 +1,92 @@
+import time
+from typing import Dict, Optional
+
+
+class RevocationFilter:
+    """
+    In-process copy of the revoked-token keys held in Redis.
+
+    Most tokens are never revoked, so once the filter is in sync a miss
+    answers "not revoked" without a network round trip. It is filled by a
+    full scan taken after subscribing to the revocation channel, then kept
+    current from that channel. While it is not ready (before the first
+    sync, after the subscription drops, or after outgrowing max_size)
+    ``revoked`` returns None and callers must ask Redis.
+
+    It also tracks whether Redis itself may be behind Postgres: a revocation
+    that reached public.token_blocklist while Redis was unreachable is
+    missing from Redis until the sync loop backfills it. Until then
+    ``redis_behind`` is True and callers must ask Postgres instead.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.ready = False
+        self._expiry: Dict[str, float] = {}
+        # Nothing has backfilled Redis from Postgres yet in this process
+        self.redis_behind = True
+        self._behind_marks = 0
+
+        self.local_answers = 0
+        self.remote_checks = 0
+
+    def revoked(self, key: str) -> Optional[bool]:
+        """True/False if the filter can answer on its own, None if Redis must be asked."""
+        if not self.ready:
+            self.remote_checks += 1
+            return None
+
+        self.local_answers += 1
+        expires_at = self._expiry.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, key: str, expires_at: float) -> None:
+        if expires_at <= time.time():
+            return
+
+        self._expiry[key] = expires_at
+        if len(self._expiry) > self.max_size:
+            self.purge()
+            if len(self._expiry) > self.max_size:
+                # Too many live revocations to hold; Redis answers until the next sync
+                self.reset()
+
+    def purge(self) -> int:
+        """Drop entries whose token has expired anyway; returns how many."""
+        now = time.time()
+        expired = [key for key, expires_at in self._expiry.items() if expires_at <= now]
+        for key in expired:
+            del self._expiry[key]
+        return len(expired)
+
+    def mark_redis_behind(self) -> None:
+        """Record that Redis may lack revocations that Postgres has."""
+        self.redis_behind = True
+        self._behind_marks += 1
+
+    def behind_mark(self) -> int:
+        """Taken before a backfill starts, for clear_redis_behind."""
+        return self._behind_marks
+
+    def clear_redis_behind(self, mark: int) -> bool:
+        """
+        Clear after a backfill that started at ``mark``; a failure recorded
+        since then keeps Redis marked behind. Returns whether it cleared.
+        """
+        if self._behind_marks != mark:
+            return False
+        self.redis_behind = False
+        return True
+
+    def reset(self) -> None:
+        self.ready = False
+        self._expiry.clear()
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "redis_behind": self.redis_behind,
+            "size": len(self._expiry),
+            "local_answers": self.local_answers,
+            "remote_checks": self.remote_checks,
+        }
@@ -1,31 +1,105 @@
-from http.client import HTTPException
-from app.domains.school.repository.tenant import TenantRepository
-from fastapi import Request
+from fastapi import HTTPException, Request
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import event, select
 from sqlalchemy.pool import NullPool
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Dict
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 from app.config.settings import settings
+from app.db.engine_registry import TenantEngineRegistry
+from app.db.metrics import (
+    InstrumentedAsyncQueuePool,
+    engine_metrics,
+    instrument_engine,
+    metrics_for,
+    pool_stats,
+    statement_timeouts,
+)
+from app.db.tenant_directory import TenantDirectory, TenantRecord
+from app.db.tenant_quotas import TenantQuotas
+from app.db.shards import DEFAULT_SHARD, shard_url
+from app.utils.errors import RequestDeadlineExceeded
+from app.config.tenant_context import get_tenant_context
+from app.domains.school.models.tenant import Tenant
+from uuid import UUID, uuid4
+import itertools
 import logging
+import time
 
 # Configure logging
 logging.basicConfig()
 logger = logging.getLogger('sqlalchemy.engine')
 logger.setLevel(logging.INFO if settings.DEBUG else logging.WARNING)
 
+
+def engine_options(pool_size: int, max_overflow: int) -> dict:
+    """
+    Pool and driver keyword arguments for create_async_engine.
+
+    Honours DB_USE_POOL, and DB_PGBOUNCER which turns off asyncpg's statement
+    caches and gives every prepared statement a unique name, since a
+    transaction pooler may hand each transaction a different server connection.
+    """
+    options: dict = {"poolclass": NullPool}
+    if settings.DB_USE_POOL:
+        options = {
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        }
+
+    if settings.DB_PGBOUNCER:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        # Pooled connections live long enough for hot queries to be prepared
+        # once and reused; size the per-connection cache for that.
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    return options
+
+
+def applies_schema_per_transaction() -> bool:
+    """True when tenant sessions apply their schema per transaction, not per engine."""
+    return settings.TENANT_ENGINE_MODE in ("shared", "translate") or settings.DB_PGBOUNCER
+
+
 # Master DB Engine
 master_async_engine = create_async_engine(
     str(settings.MASTER_DB_URL),
     echo=settings.DEBUG,
     pool_pre_ping=True,
-    poolclass=NullPool
+    **engine_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 )
+instrument_engine(master_async_engine, "master")
+
+# Tenant Session Factories, keyed by (schema, billing tier, shard) and built once per engine
+tenant_session_factories: Dict[Tuple[str, Optional[str], str], async_sessionmaker] = {}
+
+
+def _drop_session_factories(tenant_id: str) -> None:
+    for key in [k for k in tenant_session_factories if k[0] == tenant_id]:
+        del tenant_session_factories[key]
+
 
 # Tenant Engine Cache
-tenant_engines: Dict[str, AsyncEngine] = {}
+tenant_engines = TenantEngineRegistry(
+    max_size=settings.TENANT_ENGINE_CACHE_SIZE,
+    idle_timeout=settings.TENANT_ENGINE_IDLE_TIMEOUT,
+    on_evict=_drop_session_factories,
+    dispose_grace=settings.TENANT_ENGINE_DISPOSE_GRACE,
+)
+
+# One engine per shard, shared by its tenants when TENANT_ENGINE_MODE is "shared" or "translate"
+shared_tenant_engines: Dict[str, AsyncEngine] = {}
 
 # Master Session Factory
 MasterAsyncSessionLocal = sessionmaker(
@@ -39,8 +113,9 @@ MasterAsyncSessionLocal = sessionmaker(
 # Master Schema Session
 
 @asynccontextmanager
-async def get_master_session() -> AsyncGenerator[AsyncSession, None]:
-    async with MasterAsyncSessionLocal() as session:
+async def get_master_session(deadline: Optional[float] = None) -> AsyncGenerator[AsyncSession, None]:
+    info = {"deadline": deadline} if deadline is not None else {}
+    async with MasterAsyncSessionLocal(info=info) as session:
         try:
             yield session
         except Exception:
@@ -51,6 +126,37 @@ async def get_master_session() -> AsyncGenerator[AsyncSession, None]:
 
 
 
+# Tenant Directory (cached subdomain/UUID -> tenant lookups)
+
+async def load_tenant_record(identifier: str) -> Optional[TenantRecord]:
+    try:
+        condition = Tenant.id == UUID(identifier)
+    except ValueError:
+        condition = Tenant.subdomain == identifier
+
+    async with get_master_session() as session:
+        result = await session.execute(select(Tenant).where(condition))
+        tenant = result.scalar_one_or_none()
+
+    return TenantRecord.from_model(tenant) if tenant else None
+
+
+tenant_directory = TenantDirectory(
+    loader=load_tenant_record,
+    ttl=settings.TENANT_CACHE_TTL,
+    negative_ttl=settings.TENANT_CACHE_NEGATIVE_TTL,
+    max_size=settings.TENANT_CACHE_MAX_SIZE,
+)
+
+# Per-tenant concurrency limits by billing tier
+tenant_quotas = TenantQuotas(
+    limits_by_tier=settings.TENANT_MAX_CONCURRENCY_BY_TIER,
+    default_limit=settings.TENANT_DEFAULT_MAX_CONCURRENCY,
+    wait_timeout=settings.TENANT_QUOTA_WAIT_TIMEOUT,
+)
+
+
+
 # Tenant Engine and Session Management
 
 # def get_tenant_engine(tenant_id: str) -> AsyncEngine:
@@ -80,46 +186,239 @@ async def get_master_session() -> AsyncGenerator[AsyncSession, None]:
 
 #     return tenant_engines[tenant_id]
 
-def get_tenant_engine(tenant_id: str) -> AsyncEngine:
-    if tenant_id not in tenant_engines:
+def get_tenant_engine(
+    tenant_id: str,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    shard_id: str | None = None,
+) -> AsyncEngine:
+    """
+    Get or create the engine bound to a tenant schema on its shard.
+
+    Pool sizing defaults to TENANT_DB_POOL_SIZE / TENANT_DB_MAX_OVERFLOW and
+    only applies when the engine is first created. In shared mode sessions do
+    not use these engines; they remain for DDL and bootstrap work. With
+    DB_PGBOUNCER the engine carries no search_path, so direct engine work
+    must use schema-qualified metadata (as SchemaFactory produces). A cached
+    engine pointing at another shard (the tenant was moved) is replaced.
+    """
+    url = shard_url(shard_id)
+
+    def create_engine() -> AsyncEngine:
         engine = create_async_engine(
-            str(settings.SHARED_DB_URL),
+            url,
             echo=settings.DEBUG,
             pool_pre_ping=True,
-            poolclass=NullPool
+            **engine_options(
+                pool_size if pool_size is not None else settings.TENANT_DB_POOL_SIZE,
+                max_overflow if max_overflow is not None else settings.TENANT_DB_MAX_OVERFLOW,
+            )
         )
-
-        @event.listens_for(engine.sync_engine, "connect")
-        def set_search_path(dbapi_connection, connection_record):
-            cursor = dbapi_connection.cursor()
-            try:
-                # Proper parametrized version — safe & respects case
-                cursor.execute(f'SET search_path TO "{tenant_id}", public')
-            finally:
-                cursor.close()
-
-        tenant_engines[tenant_id] = engine
+        # Per-tenant engines report together; one label per tenant would not scale
+        metrics = instrument_engine(engine, "tenant")
+
+        # With pooling this runs once per physical connection, not per checkout;
+        # the connections never leave this engine so the search_path sticks.
+        # Behind PgBouncer the server connection changes per transaction, so
+        # sessions use SET LOCAL instead (see apply_tenant_schema).
+        if not settings.DB_PGBOUNCER:
+            @event.listens_for(engine.sync_engine, "connect")
+            def set_search_path(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                try:
+                    # Proper parametrized version — safe & respects case
+                    cursor.execute(f'SET search_path TO "{tenant_id}", public')
+                finally:
+                    cursor.close()
+                metrics.search_path_resets += 1
 
         if settings.DEBUG:
             logger.info(f"Created tenant engine for schema: {tenant_id}")
 
-    return tenant_engines[tenant_id]
+        return engine
 
+    # Tagged with the shard id, not the DSN: SQLAlchemy re-renders URLs
+    # (query order, password escaping), so they do not compare reliably.
+    return tenant_engines.get_or_create(tenant_id, create_engine, tag=shard_id or DEFAULT_SHARD)
 
 
-@asynccontextmanager
-async def get_tenant_session(tenant_id: str) -> AsyncGenerator[AsyncSession, None]:
-    """Async context manager for tenant-specific sessions."""
-    engine = get_tenant_engine(tenant_id)
 
-    TenantAsyncSessionLocal = sessionmaker(
-        bind=engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autoflush=False
-    )
+# Shared Tenant Engine (TENANT_ENGINE_MODE == "shared" or "translate")
+
+class TenantSyncSession(Session):
+    """Sync session class for tenant sessions that apply their schema per transaction.
+
+    The tenant schema travels in ``session.info["tenant_schema"]`` and is
+    applied by the ``after_begin`` hook below.
+    """
+
+
+@event.listens_for(TenantSyncSession, "after_begin")
+def apply_tenant_schema(session, transaction, connection):
+    schema_name = session.info.get("tenant_schema")
+    if not schema_name:
+        return
+
+    if settings.TENANT_ENGINE_MODE == "translate":
+        # Schema-less (tenant) tables render as "<schema>.<table>" at execution
+        # time, so every tenant shares one compiled-statement cache and the
+        # connection never carries tenant state.
+        connection.execution_options(schema_translate_map={None: schema_name})
+    else:
+        # Tag the connection for key_statements_by_tenant before any SQL runs
+        connection.execution_options(tenant_schema=schema_name)
+        # SET LOCAL is scoped to the transaction, so the pooled connection
+        # goes back to the pool without any tenant state on it.
+        connection.exec_driver_sql(f'SET LOCAL search_path TO "{schema_name}", public')
+        metrics = metrics_for(connection.engine)
+        if metrics is not None:
+            metrics.search_path_resets += 1
+
+
+def statement_timeout_ms(billing_tier: Optional[str] = None) -> int:
+    """Request deadline for a billing tier, in milliseconds (0 disables it)."""
+    if billing_tier:
+        timeout = settings.STATEMENT_TIMEOUT_MS_BY_TIER.get(billing_tier.lower())
+        if timeout is not None:
+            return timeout
+    return settings.DEFAULT_STATEMENT_TIMEOUT_MS
+
+
+def request_deadline(timeout_ms: int) -> Optional[float]:
+    """time.monotonic() deadline for a request starting now, or None when disabled."""
+    return time.monotonic() + timeout_ms / 1000 if timeout_ms > 0 else None
+
+
+@event.listens_for(Session, "after_begin")
+def apply_statement_deadline(session, transaction, connection):
+    """
+    Turn ``session.info["deadline"]`` into a transaction-scoped statement_timeout.
+
+    Each transaction gets whatever is left of the request's budget, so a slow
+    query is cancelled by Postgres (SQLSTATE 57014) instead of holding the
+    connection past the point the client has given up.
+    """
+    deadline = session.info.get("deadline")
+    if deadline is None:
+        return
+
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        raise RequestDeadlineExceeded()
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+
+
+def key_statements_by_tenant(conn, cursor, statement, parameters, context, executemany):
+    """
+    Prefix tenant SQL with its schema so prepared statements are cached per tenant.
+
+    asyncpg caches prepared statements by SQL text. Under a per-transaction
+    search_path (shared mode, read replicas) the same text means a different
+    table for each tenant, so the schema tag keeps each cached statement
+    bound to the schema it was prepared for. Untagged, Postgres re-parses a
+    statement whenever the search_path differs from its previous use, so the
+    tag costs cache space but no hits (tests/test_statement_cache.py).
+    Schema-qualified SQL (translate mode) does not need this.
+    """
+    schema_name = context.execution_options.get("tenant_schema") if context is not None else None
+    if schema_name:
+        statement = f"/* tenant:{schema_name.replace('*/', '')} */ {statement}"
+    return statement, parameters
+
+
+def get_shared_tenant_engine(shard_id: Optional[str] = None) -> AsyncEngine:
+    """Get or create the engine used by every tenant of a shard in shared mode."""
+    shard_id = shard_id or DEFAULT_SHARD
+    shared_tenant_engine = shared_tenant_engines.get(shard_id)
+    if shared_tenant_engine is None:
+        shared_tenant_engine = create_async_engine(
+            shard_url(shard_id),
+            echo=settings.DEBUG,
+            pool_pre_ping=True,
+            **engine_options(
+                settings.SHARED_TENANT_DB_POOL_SIZE,
+                settings.SHARED_TENANT_DB_MAX_OVERFLOW,
+            )
+        )
+        instrument_engine(shared_tenant_engine, "tenant_shared")
+        if settings.TENANT_ENGINE_MODE == "shared" and not settings.DB_PGBOUNCER:
+            event.listen(
+                shared_tenant_engine.sync_engine,
+                "before_cursor_execute",
+                key_statements_by_tenant,
+                retval=True,
+            )
+        shared_tenant_engines[shard_id] = shared_tenant_engine
+        logger.info(f"Created shared tenant engine for shard: {shard_id}")
+
+    return shared_tenant_engine
+
+
+def _session_options(billing_tier: Optional[str]) -> dict:
+    options = {"expire_on_commit": False, "autoflush": False}
+    if billing_tier:
+        options.update(settings.TENANT_SESSION_OPTIONS_BY_TIER.get(billing_tier.lower(), {}))
+    return options
+
+
+def get_tenant_session_factory(
+    tenant_id: str, billing_tier: Optional[str] = None, shard_id: Optional[str] = None
+) -> async_sessionmaker:
+    """
+    Get the cached session factory for a tenant.
+
+    Per-tenant engines get one factory per (schema, tier); it is dropped when
+    the registry evicts the engine. In shared and translate modes one factory
+    per tier and shard serves every schema and the schema is passed per
+    session through ``info``.
+    """
+    shard_id = shard_id or DEFAULT_SHARD
+    if settings.TENANT_ENGINE_MODE in ("shared", "translate"):
+        engine = get_shared_tenant_engine(shard_id)
+        key = ("", billing_tier, shard_id)
+    else:
+        # Cap the tenant's own pool at its tier's concurrency limit
+        limit = tenant_quotas.limit_for(billing_tier)
+        pool_size = min(settings.TENANT_DB_POOL_SIZE, limit)
+        engine = get_tenant_engine(
+            tenant_id, pool_size=pool_size, max_overflow=limit - pool_size, shard_id=shard_id
+        )
+        key = (tenant_id, billing_tier, shard_id)
+
+    factory = tenant_session_factories.get(key)
+    if factory is None or factory.kw["bind"] is not engine:
+        options = _session_options(billing_tier)
+        if applies_schema_per_transaction():
+            options["sync_session_class"] = TenantSyncSession
+        factory = async_sessionmaker(bind=engine, class_=AsyncSession, **options)
+        tenant_session_factories[key] = factory
+
+    return factory
+
+
+def new_tenant_session(
+    tenant_id: str,
+    billing_tier: Optional[str] = None,
+    deadline: Optional[float] = None,
+    shard_id: Optional[str] = None,
+) -> AsyncSession:
+    """Create (but do not connect) a session for a tenant; the caller closes it."""
+    TenantAsyncSessionLocal = get_tenant_session_factory(tenant_id, billing_tier, shard_id)
+    info = {"tenant_schema": tenant_id}
+    if deadline is not None:
+        info["deadline"] = deadline
+    return TenantAsyncSessionLocal(info=info)
+
 
-    async with TenantAsyncSessionLocal() as session:
+@asynccontextmanager
+async def get_tenant_session(
+    tenant_id: str,
+    billing_tier: Optional[str] = None,
+    deadline: Optional[float] = None,
+    shard_id: Optional[str] = None,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Async context manager for tenant-specific sessions."""
+    async with new_tenant_session(tenant_id, billing_tier, deadline, shard_id) as session:
         try:
             yield session
         except Exception:
@@ -146,34 +445,144 @@ async def get_tenant_session(tenant_id: str) -> AsyncGenerator[AsyncSession, Non
 
 @asynccontextmanager
 async def db_session_dependency(request: Request) -> AsyncGenerator[AsyncSession, None]:
-    subdomain = request.headers.get("X-Tenant-ID") or request.url.hostname.split(".")[0]
+    ctx = get_tenant_context(request)
+    deadline = getattr(request.state, "deadline", None)
+    if ctx is not None:
+        # Already resolved by the middleware for this request
+        subdomain = ctx.subdomain if ctx.is_tenant else None
+    else:
+        subdomain = request.headers.get("X-Tenant-ID") or request.url.hostname.split(".")[0]
 
     if subdomain and subdomain != "api":
-        # Step 1: Get schema_name from master DB using subdomain
-        async with get_master_session() as master_session:
-            tenant_repo = TenantRepository(master_session)
-            tenant = await tenant_repo.get_by_subdomain(subdomain)
+        # Step 1: Get schema_name from the tenant directory (master DB on a miss)
+        tenant = ctx.tenant if ctx is not None else await tenant_directory.resolve(subdomain)
 
-            if not tenant:
-                raise HTTPException(status_code=404, detail="Tenant not found")
-
-            schema_name = tenant.schema_name
+        if not tenant:
+            raise HTTPException(status_code=404, detail="Tenant not found")
 
         # Step 2: Use schema_name to get session
-        async with get_tenant_session(schema_name) as tenant_session:
+        async with get_tenant_session(
+            tenant.schema_name, tenant.billing_tier, deadline, tenant.effective_shard
+        ) as tenant_session:
             yield tenant_session
     else:
-        async with get_master_session() as session:
+        async with get_master_session(deadline) as session:
+            yield session
+
+
+
+# Read Replicas
+
+replica_engines: List[AsyncEngine] = []
+_replica_cursor = itertools.count()
+
+# Replica sessions always switch search_path per transaction, so one pool per
+# replica serves the master schema and every tenant.
+ReplicaAsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=TenantSyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+
+def get_replica_engine() -> Optional[AsyncEngine]:
+    """Next replica engine (round-robin), or None when no replicas are configured."""
+    if not settings.READ_REPLICA_URLS:
+        return None
+
+    if not replica_engines:
+        for url in settings.READ_REPLICA_URLS:
+            engine = create_async_engine(
+                url,
+                echo=settings.DEBUG,
+                pool_pre_ping=True,
+                **engine_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+            )
+            instrument_engine(engine, "replica")
+            if not settings.DB_PGBOUNCER:
+                # Replica sessions switch search_path per transaction, as shared mode does
+                event.listen(engine.sync_engine, "before_cursor_execute", key_statements_by_tenant, retval=True)
+            replica_engines.append(engine)
+
+    return replica_engines[next(_replica_cursor) % len(replica_engines)]
+
+
+@asynccontextmanager
+async def get_read_session(
+    tenant_id: Optional[str] = None,
+    billing_tier: Optional[str] = None,
+    deadline: Optional[float] = None,
+    shard_id: Optional[str] = None,
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only work, served by a replica when one is configured.
+
+    ``tenant_id`` is the tenant schema; None reads the master (public) schema.
+    Falls back to the primary sessions when READ_REPLICA_URLS is empty. The
+    replicas follow the default shard, so tenants on other shards read from
+    their shard's primary.
+    """
+    on_default_shard = (shard_id or DEFAULT_SHARD) == DEFAULT_SHARD
+    engine = get_replica_engine() if on_default_shard else None
+    if engine is None:
+        primary = (
+            get_tenant_session(tenant_id, billing_tier, deadline, shard_id)
+            if tenant_id
+            else get_master_session(deadline)
+        )
+        async with primary as session:
             yield session
+        return
+
+    info = {"tenant_schema": tenant_id} if tenant_id else {}
+    if deadline is not None:
+        info["deadline"] = deadline
+    async with ReplicaAsyncSessionLocal(bind=engine, info=info) as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
 
 
+# Utility: Engine and Pool Stats
+
+def collect_db_stats() -> dict:
+    """Snapshot of every live engine's pool plus the connection metrics."""
+    tenant_pools = {schema: pool_stats(engine) for schema, engine in tenant_engines.items()}
+    return {
+        "engines": {
+            "master": pool_stats(master_async_engine),
+            "tenant_shared": {shard: pool_stats(engine) for shard, engine in shared_tenant_engines.items()},
+            "tenants": tenant_pools,
+            "replicas": [pool_stats(engine) for engine in replica_engines],
+        },
+        "engine_count": 1 + len(tenant_pools) + len(shared_tenant_engines) + len(replica_engines),
+        "tenant_engine_registry": tenant_engines.stats(),
+        "tenant_directory": tenant_directory.stats(),
+        "tenant_quotas": tenant_quotas.stats(),
+        "metrics": {label: metrics.snapshot() for label, metrics in engine_metrics.items()},
+        "statement_timeouts": dict(statement_timeouts),
+    }
+
 
 
 # Utility: Clear Cached Engines
 
 async def clear_engine_cache():
     """Dispose all cached tenant engines."""
-    for engine in tenant_engines.values():
+    await tenant_engines.clear()
+    tenant_session_factories.clear()
+
+    for engine in shared_tenant_engines.values():
+        await engine.dispose()
+    shared_tenant_engines.clear()
+
+    for engine in replica_engines:
         await engine.dispose()
-    tenant_engines.clear()
+    replica_engines.clear()
     logger.info("Cleared tenant engine cache.")
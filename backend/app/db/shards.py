@@ -0,0 +1,44 @@
+from typing import Dict, Optional
+
+from app.config.settings import settings
+
+# Shard every existing tenant lives on; backed by SHARED_DB_URL, the same
+# database as the master (public) schema.
+DEFAULT_SHARD = "default"
+
+# A tenant with its own database is routed as a single-tenant shard named
+# "dedicated:<database_ref>", resolved through TENANT_DATABASE_URLS.
+DEDICATED_PREFIX = "dedicated:"
+
+
+def dedicated_shard(database_ref: str) -> str:
+    return f"{DEDICATED_PREFIX}{database_ref}"
+
+
+def shard_urls() -> Dict[str, str]:
+    """Shard id -> DSN for every configured tenant shard."""
+    return {DEFAULT_SHARD: str(settings.SHARED_DB_URL), **settings.TENANT_SHARD_URLS}
+
+
+def shard_url(shard_id: Optional[str]) -> str:
+    """DSN for a shard id, including dedicated database shards."""
+    shard_id = shard_id or DEFAULT_SHARD
+    try:
+        if shard_id.startswith(DEDICATED_PREFIX):
+            return settings.TENANT_DATABASE_URLS[shard_id[len(DEDICATED_PREFIX):]]
+        return shard_urls()[shard_id]
+    except KeyError:
+        raise ValueError(f"Unknown tenant shard '{shard_id}'")
+
+
+def hosts_public_schema(shard_id: Optional[str]) -> bool:
+    """True for the shard that shares a database with the master (public) schema."""
+    return shard_url(shard_id) == str(settings.MASTER_DB_URL)
+
+
+def least_loaded_shard(tenant_counts: Dict[str, int]) -> str:
+    """The configured shared shard with the fewest tenants; ties go to the default shard."""
+    return min(
+        shard_urls(),
+        key=lambda shard_id: (tenant_counts.get(shard_id, 0), shard_id != DEFAULT_SHARD, shard_id),
+    )
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from app.db.shards import dedicated_shard
+from app.domains.school.models.tenant import Tenant
+
+
+@dataclass(frozen=True)
+class TenantRecord:
+    """The slice of public.tenants needed to route a request."""
+
+    id: UUID
+    subdomain: str
+    schema_name: str
+    is_active: bool
+    billing_tier: str
+    shard_id: str
+    database_ref: Optional[str] = None
+
+    @classmethod
+    def from_model(cls, tenant: Tenant) -> "TenantRecord":
+        return cls(
+            id=tenant.id,
+            subdomain=tenant.subdomain,
+            schema_name=tenant.schema_name,
+            is_active=tenant.is_active,
+            billing_tier=tenant.billing_tier,
+            shard_id=tenant.shard_id,
+            database_ref=tenant.database_ref,
+        )
+
+    @property
+    def effective_shard(self) -> str:
+        """Shard the tenant's schema lives on: its dedicated database when it has one."""
+        return dedicated_shard(self.database_ref) if self.database_ref else self.shard_id
+
+
+class TenantDirectory:
+    """
+    In-process cache of tenant lookups by subdomain or UUID.
+
+    Hits skip the master DB entirely. Unknown identifiers are cached for
+    negative_ttl so a stream of bad hosts cannot hammer public.tenants, and
+    concurrent misses for the same identifier share a single query. The
+    loader receives the raw identifier and performs the actual lookup.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Awaitable[Optional[TenantRecord]]],
+        ttl: float,
+        negative_ttl: float,
+        max_size: int,
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: Dict[str, Tuple[float, Optional[TenantRecord]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, identifier: str) -> Optional[TenantRecord]:
+        """Return the tenant for a subdomain or UUID string, or None if unknown."""
+        key = self._key(identifier)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # this waiter itself was cancelled
+                # The request doing the lookup went away; the next caller leads
+                return await self.resolve(identifier)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            record = await self.loader(identifier)
+            self._store(key, record)
+            if record is not None:
+                self._store(self._key(record.id), record)
+                self._store(self._key(record.subdomain), record)
+            future.set_result(record)
+            return record
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it so a future nobody else awaited does not warn.
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                # The leader was cancelled (client gone, deadline); waiters
+                # must not hang on its future.
+                future.cancel()
+
+    def invalidate(self, tenant_id: UUID | str | None = None, subdomain: str | None = None) -> None:
+        """Drop cached entries for a tenant, by id and/or subdomain."""
+        keys = set()
+        if tenant_id is not None:
+            keys.add(self._key(tenant_id))
+        if subdomain is not None:
+            keys.add(self._key(subdomain))
+
+        for key in list(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None:
+                keys.add(self._key(entry[1].id))
+                keys.add(self._key(entry[1].subdomain))
+
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def prime(self, record: TenantRecord) -> None:
+        """Seed the cache with an already-loaded tenant (used by startup warm-up)."""
+        self._store(self._key(record.id), record)
+        self._store(self._key(record.subdomain), record)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _store(self, key: str, record: Optional[TenantRecord]) -> None:
+        ttl = self.ttl if record is not None else self.negative_ttl
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.max_size:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + ttl, record)
+
+    @staticmethod
+    def _key(identifier: UUID | str) -> str:
+        return str(identifier).strip()
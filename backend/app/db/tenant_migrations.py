@@ -0,0 +1,27 @@
+"""
+Tenant schema migrations: a version chain of their own (migrations/tenant),
+recorded in an alembic_version table inside each tenant schema.
+
+    alembic -n tenant -x database=<shard> upgrade head
+"""
+
+from pathlib import Path
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Connection
+
+TENANT_MIGRATIONS = Path(__file__).resolve().parents[2] / "migrations" / "tenant"
+
+
+def tenant_scripts() -> ScriptDirectory:
+    return ScriptDirectory(str(TENANT_MIGRATIONS))
+
+
+def stamp_tenant_schema(connection: Connection, schema_name: str) -> None:
+    """
+    Record a newly created schema as up to date; its tables were created
+    from the current models, so no tenant migration applies to it.
+    """
+    context = MigrationContext.configure(connection, opts={"version_table_schema": schema_name})
+    context.stamp(tenant_scripts(), "head")
@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from app.utils.errors import TenantOverQuota
+
+
+class TenantSlots:
+    """One tenant's semaphore and the counts TenantQuotas keeps for it."""
+
+    __slots__ = ("limit", "semaphore", "in_use", "waiting", "rejections")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_use = 0
+        self.waiting = 0
+        self.rejections = 0
+
+    @property
+    def idle(self) -> bool:
+        return self.in_use == 0 and self.waiting == 0
+
+
+class TenantQuotas:
+    """
+    Per-tenant concurrency limits, sized by billing tier.
+
+    Each tenant schema gets its own semaphore, so a burst from one tenant
+    queues behind its own limit instead of taking connections from everyone
+    else. asyncio.Semaphore wakes waiters in arrival order, which keeps the
+    queue fair; a waiter that cannot get a slot within ``wait_timeout``
+    gets TenantOverQuota. Only tenants with requests in flight or queued
+    have an entry: it is dropped as soon as it goes idle, which is also
+    when a tier change takes effect.
+    """
+
+    def __init__(self, limits_by_tier: Dict[str, int], default_limit: int, wait_timeout: float):
+        self.limits_by_tier = {tier.lower(): limit for tier, limit in limits_by_tier.items()}
+        self.default_limit = default_limit
+        self.wait_timeout = wait_timeout
+        self._slots: Dict[str, TenantSlots] = {}
+        self.rejections = 0
+
+    def limit_for(self, billing_tier: Optional[str]) -> int:
+        if not billing_tier:
+            return self.default_limit
+        return self.limits_by_tier.get(billing_tier.lower(), self.default_limit)
+
+    @asynccontextmanager
+    async def acquire(self, schema_name: str, billing_tier: Optional[str]) -> AsyncIterator[None]:
+        """Hold one of the tenant's slots for the duration of the block."""
+        slots = self._slots.get(schema_name)
+        if slots is None:
+            slots = self._slots[schema_name] = TenantSlots(self.limit_for(billing_tier))
+
+        slots.waiting += 1
+        try:
+            await asyncio.wait_for(slots.semaphore.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            slots.rejections += 1
+            self.rejections += 1
+            raise TenantOverQuota()
+        else:
+            slots.in_use += 1
+        finally:
+            slots.waiting -= 1
+            self._drop_if_idle(schema_name, slots)
+
+        try:
+            yield
+        finally:
+            slots.in_use -= 1
+            slots.semaphore.release()
+            self._drop_if_idle(schema_name, slots)
+
+    def stats(self) -> dict:
+        return {
+            "rejections": self.rejections,
+            "tenants": {
+                schema: {
+                    "limit": slots.limit,
+                    "in_use": slots.in_use,
+                    "waiting": slots.waiting,
+                    "rejections": slots.rejections,
+                }
+                for schema, slots in self._slots.items()
+            },
+        }
+
+    def _drop_if_idle(self, schema_name: str, slots: TenantSlots) -> None:
+        if slots.idle and self._slots.get(schema_name) is slots:
+            del self._slots[schema_name]
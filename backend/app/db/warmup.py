@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from typing import List
+
+from sqlalchemy import select
+
+from app.db.session import get_master_session, get_tenant_session, tenant_directory
+from app.db.tenant_directory import TenantRecord
+from app.domains.auth.models.tenant_user import TenantUser
+from app.domains.school.models.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+
+def hot_statements() -> list:
+    """Queries nearly every tenant runs early on; built the same way the repositories build them."""
+    return [
+        # TenantUserRepository.get_user_by_email (login, current user)
+        select(TenantUser).where(TenantUser.email == ""),
+    ]
+
+
+async def load_active_tenants(limit: int) -> List[TenantRecord]:
+    """Most recently updated active tenants, as a proxy for the busiest ones."""
+    async with get_master_session() as session:
+        result = await session.execute(
+            select(Tenant)
+            .where(Tenant.is_active == True)  # noqa: E712
+            .order_by(Tenant.updated_date.desc())
+            .limit(limit)
+        )
+        return [TenantRecord.from_model(tenant) for tenant in result.scalars().all()]
+
+
+async def warm_up_tenant(tenant: TenantRecord) -> None:
+    """Create the tenant's engine and session factory, open a connection and prepare hot statements."""
+    tenant_directory.prime(tenant)
+    async with get_tenant_session(tenant.schema_name, tenant.billing_tier, shard_id=tenant.effective_shard) as session:
+        for statement in hot_statements():
+            await session.execute(statement)
+        await session.rollback()
+
+
+async def warm_up_tenants(limit: int, concurrency: int, timeout: float) -> int:
+    """
+    Warm up to ``limit`` tenants, ``concurrency`` at a time, within ``timeout`` seconds.
+
+    Failures and the deadline are logged, never raised: warm-up only saves
+    the first requests some latency, so it must not hold up or break startup.
+    Returns the number of tenants warmed.
+    """
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(concurrency)
+    warmed = 0
+
+    async def warm(tenant: TenantRecord) -> None:
+        nonlocal warmed
+        async with semaphore:
+            try:
+                await warm_up_tenant(tenant)
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"Warm-up failed for tenant '{tenant.subdomain}': {e}")
+
+    async def warm_all() -> None:
+        tenants = await load_active_tenants(limit)
+        await asyncio.gather(*(warm(tenant) for tenant in tenants))
+
+    try:
+        await asyncio.wait_for(warm_all(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Tenant warm-up stopped after {timeout}s")
+    except Exception as e:
+        logger.warning(f"Tenant warm-up skipped: {e}")
+
+    logger.info(f"Warmed {warmed} tenant(s) in {time.monotonic() - started:.2f}s")
+    return warmed
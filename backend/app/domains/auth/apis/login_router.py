@@ -1,8 +1,10 @@
-from typing import Annotated, AsyncGenerator
+from datetime import datetime, timezone
+from typing import Annotated
 
 from fastapi.responses import JSONResponse
 
-from app.db.session import db_session_dependency, get_master_session
+from app.db.session import db_session_dependency
+from app.utils.dependencies import get_master_session_dep
 from fastapi import APIRouter, Depends, status, Request
 from app.domains.auth.repository.token_blocklist import TokenBlocklistRepository
 from app.domains.auth.schemas.auth import TokenData, TokenResponse
@@ -10,6 +12,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.domains.auth.schemas.login_schema import UserLoginModel
 from app.domains.auth.services.login_service import AuthService
+from app.domains.auth.services.token import TokenService
 from app.utils.errors import UserAlreadyExists, UserNotFound, InvalidCredentials, InvalidToken
 from app.domains.auth.services.login_service import AuthService
 from app.utils.auth_dep import RefreshTokenBearer, AccessTokenBearer, RoleChecker
@@ -23,10 +26,6 @@ auth_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-async def get_master_session_dep() -> AsyncGenerator[AsyncSession, None]:
-    async with get_master_session() as session:
-        yield session
-
 sessionDep = Annotated[AsyncSession, Depends(get_master_session_dep)]
 
 roleCheck = RoleChecker(['admin', 'user'])
@@ -92,10 +91,15 @@ async def logout(
     token_data: dict = Depends(AccessTokenBearer()),
     
 ):
-    jti = token_data["jti"]
     tenant = token_data.get("tenant")
 
-    blocklist_repo = TokenBlocklistRepository(session)
-    await blocklist_repo.add_token_to_blocklist(jti, tenant)
+    token_service = TokenService(TokenBlocklistRepository(session))
+    await token_service.revoke_token(
+        jti=token_data["jti"],
+        expires_at=datetime.fromtimestamp(token_data["exp"], tz=timezone.utc),
+        user_id=token_data["sub"],
+        tenant=tenant,
+        is_tenant_user=tenant is not None,
+    )
 
     return {"message": "Logout successful"}
\ No newline at end of file
@@ -6,12 +6,13 @@ from typing import Annotated, List
 
 from app.domains.auth.schemas.permission import PermissionCreate, PermissionSchema, PermissionUpdate
 from app.domains.auth.services.permission import PermissionService
-from app.db.session import get_master_session
+from app.utils.dependencies import get_master_session_dep, get_read_session_dep
 
 
 router = APIRouter()
 
-sessionDep = Annotated[AsyncSession, Depends(get_master_session)]
+sessionDep = Annotated[AsyncSession, Depends(get_master_session_dep)]
+readSessionDep = Annotated[AsyncSession, Depends(get_read_session_dep)]
 
 permission_router = APIRouter(
     prefix="/permissions",
@@ -33,7 +34,7 @@ async def update_permission(permission_id: UUID4, permission_data: PermissionUpd
 
 
 @permission_router.get("/", response_model=List[PermissionSchema])
-async def get_all_permissions(session: sessionDep):
+async def get_all_permissions(session: readSessionDep):
     _service = PermissionService(session)
     return await _service.get_all()
 
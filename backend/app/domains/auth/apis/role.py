@@ -7,12 +7,12 @@ from typing import Annotated, List
 from app.domains.auth.repository.role import RoleRepository
 from app.domains.auth.schemas.role import RoleCreate, RoleSchema, RoleUpdate
 from app.domains.auth.services.role import RoleService
-from app.db.session import get_master_session
+from app.utils.dependencies import get_master_session_dep
 
 
 router = APIRouter()
 
-sessionDep = Annotated[AsyncSession, Depends(get_master_session)]
+sessionDep = Annotated[AsyncSession, Depends(get_master_session_dep)]
 
 role_router = APIRouter(
     prefix="/roles",
@@ -1,6 +1,7 @@
-from typing import Annotated, AsyncGenerator, List
+from typing import Annotated, List
 
-from app.db.session import db_session_dependency, get_master_session
+from app.db.session import db_session_dependency
+from app.utils.dependencies import get_master_session_dep
 from fastapi import APIRouter, Depends, status
 from pydantic import UUID4
 from sqlalchemy.ext.asyncio.session import AsyncSession
@@ -21,10 +22,6 @@ user_router = APIRouter(
 
 
 
-async def get_master_session_dep() -> AsyncGenerator[AsyncSession, None]:
-    async with get_master_session() as session:
-        yield session
-
 sessionDep = Annotated[AsyncSession, Depends(get_master_session_dep)]
     
 access_token_bearer = Annotated[dict, Depends(AccessTokenBearer())]
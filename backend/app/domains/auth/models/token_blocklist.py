@@ -9,10 +9,13 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 
 class TokenBlocklist(APIBase, table=True):
     __tablename__ = "token_blocklist"
-    __table_args__ = {"schema": "public"}
+    # Range-partitioned by day of expiry so expired revocations are dropped a
+    # partition at a time (see TokenBlocklistRepository.ensure_partitions).
+    # Postgres requires the partition key in the primary key.
+    __table_args__ = {"schema": "public", "postgresql_partition_by": "RANGE (expires_at)"}
 
     jti: str = Field(index=True, nullable=False)
-    expires_at: datetime = Field(nullable=False)
+    expires_at: datetime = Field(nullable=False, primary_key=True)
     
     global_user_id: UUID | None = Field(
         default=None,
@@ -56,7 +56,7 @@ class TenantUserRepository(BaseRepository[ModelType, TenantUserCreate, TenantUse
         logger.info(f"Creating tenant user in model: {self.model.__tablename__}")
         new_user = TenantUser(**user_data_dict)
 
-        new_user.password = Security.generate_password_hash(user_data_dict["password"])
+        new_user.password = await Security.generate_password_hash_async(user_data_dict["password"])
         # new_user.role = "user"
 
 
@@ -1,19 +1,45 @@
+import re
 from uuid import uuid4
-from sqlalchemy import delete, select
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
 from app.utils.token_interface import ITokenRepository
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.domains.auth.models.token_blocklist import TokenBlocklist
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 from app.config.settings import settings
 
+PARTITION_PREFIX = "token_blocklist_p"
+PARTITION_NAME = re.compile(rf"{PARTITION_PREFIX}\d{{8}}")
+# "no partition of relation ... found for row"
+NO_PARTITION_SQLSTATE = "23514"
+# Serialises partition maintenance across processes
+MAINTENANCE_LOCK_ID = 0x746F6B62
+# Slack around a token's expiry when looking it up, so the match does not
+# hinge on how the timestamp was rounded on its way in
+EXPIRY_SLACK = timedelta(seconds=1)
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
 
 class TokenBlocklistRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def is_token_blocked(self, jti: str, tenant: str | None = None) -> bool:
+    async def is_token_blocked(
+        self, jti: str, tenant: str | None = None, expires_at: datetime | None = None
+    ) -> bool:
         stmt = select(TokenBlocklist).where(TokenBlocklist.jti == jti)
 
+        # The token's own expiry pins the lookup to its partition
+        if expires_at is not None:
+            expires_at = _stored(expires_at)
+            stmt = stmt.where(
+                TokenBlocklist.expires_at.between(expires_at - EXPIRY_SLACK, expires_at + EXPIRY_SLACK)
+            )
+
         if tenant:
             stmt = stmt.where(TokenBlocklist.tenant == tenant)
         else:
@@ -22,6 +48,14 @@ class TokenBlocklistRepository:
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none() is not None
 
+    async def live_revocations(self) -> List[Tuple[str, Optional[str], datetime]]:
+        """(jti, tenant, expires_at) for every revocation that has not expired."""
+        result = await self.session.execute(
+            select(TokenBlocklist.jti, TokenBlocklist.tenant, TokenBlocklist.expires_at)
+            .where(TokenBlocklist.expires_at > _stored(datetime.now(timezone.utc)))
+        )
+        return [(jti, tenant, expires_at.replace(tzinfo=timezone.utc)) for jti, tenant, expires_at in result.all()]
+
     async def add_token_to_blocklist(
         self,
         jti: str,
@@ -30,6 +64,7 @@ class TokenBlocklistRepository:
         tenant: str | None = None,
         is_tenant_user: bool = False
     ):
+        expires_at = _stored(expires_at)
         token_entry = TokenBlocklist(
             jti=jti,
             expires_at=expires_at,
@@ -42,13 +77,155 @@ class TokenBlocklistRepository:
             token_entry.global_user_id = user_id
 
         self.session.add(token_entry)
+        try:
+            await self.session.commit()
+        except IntegrityError as e:
+            if _sqlstate(e) != NO_PARTITION_SQLSTATE:
+                raise
+            # Expiry past the partitions maintenance keeps ahead (an unusually
+            # long-lived token): give it a partition of its own and retry.
+            await self.session.rollback()
+            await self._lock_for_maintenance()
+            if partition_name(expires_at.date()) not in {name for name, _ in await self._partitions()}:
+                await self._attach_partition(expires_at.date())
+            await self.session.commit()
+
+            self.session.add(token_entry)
+            await self.session.commit()
+
+    async def ensure_partitions(self, days_ahead: int) -> List[str]:
+        """
+        Create one partition per day from today through ``days_ahead``;
+        returns the names created.
+        """
+        await self._lock_for_maintenance()
+        existing = {name for name, _ in await self._partitions()}
+        created = []
+        today = _utc_today()
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            if partition_name(day) not in existing:
+                await self._attach_partition(day)
+                created.append(partition_name(day))
+
         await self.session.commit()
+        return created
 
     async def cleanup_expired_tokens(self) -> int:
-        stmt = delete(TokenBlocklist).where(TokenBlocklist.expires_at < datetime.now())
-        result = await self.session.execute(stmt)
-        await self.session.commit()
-        return result.rowcount
+        """
+        Detach and drop every daily partition whose whole range has expired;
+        returns how many were dropped.
+
+        DETACH ... CONCURRENTLY only takes SHARE UPDATE EXCLUSIVE on the
+        parent, so blocklist lookups and inserts carry on while it runs. It
+        cannot run inside a transaction, hence the autocommit connection.
+        A detach interrupted half-way is finished with FINALIZE next time.
+        """
+        today = _utc_today()
+        dropped = 0
+        async with self.session.bind.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID}
+            )
+            if not locked:
+                return 0  # another process is maintaining the table
+
+            try:
+                for name, state in await self._partitions(conn):
+                    if _partition_day(name) >= today:
+                        continue
+                    if state == "attached":
+                        await conn.execute(text(
+                            f'ALTER TABLE public.token_blocklist DETACH PARTITION public."{name}" CONCURRENTLY'
+                        ))
+                    elif state == "detach_pending":
+                        await conn.execute(text(
+                            f'ALTER TABLE public.token_blocklist DETACH PARTITION public."{name}" FINALIZE'
+                        ))
+                    # Detached now (or by an earlier run that failed to drop it)
+                    await conn.execute(text(f'DROP TABLE public."{name}"'))
+                    dropped += 1
+            finally:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID}
+                )
+        return dropped
+
+    async def is_partitioned(self) -> bool:
+        result = await self.session.execute(text(
+            "SELECT c.relkind = 'p' FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = 'public' AND c.relname = 'token_blocklist'"
+        ))
+        return bool(result.scalar())
+
+    async def _attach_partition(self, day: date) -> None:
+        """
+        Add the partition for ``day``. Created standalone and then attached,
+        as ATTACH PARTITION only takes SHARE UPDATE EXCLUSIVE on the parent
+        where CREATE TABLE ... PARTITION OF would block every lookup.
+        """
+        name = partition_name(day)
+        await self.session.execute(text(
+            f'CREATE TABLE public."{name}" '
+            f"(LIKE public.token_blocklist INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        await self.session.execute(text(
+            f'ALTER TABLE public.token_blocklist ATTACH PARTITION public."{name}" '
+            f"FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}')"
+        ))
+
+    async def _partitions(self, conn=None) -> List[Tuple[str, str]]:
+        """
+        (name, state) of every daily partition table, oldest first. State is
+        "attached", "detach_pending" (an interrupted CONCURRENTLY detach) or
+        "detached" (detached but not yet dropped).
+        """
+        result = await (conn or self.session).execute(text(
+            "SELECT c.relname, CASE "
+            "  WHEN i.inhrelid IS NULL THEN 'detached' "
+            "  WHEN i.inhdetachpending THEN 'detach_pending' "
+            "  ELSE 'attached' END "
+            "FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+            "  AND i.inhparent = 'public.token_blocklist'::regclass "
+            "WHERE n.nspname = 'public' AND c.relkind = 'r' AND c.relname LIKE :pattern "
+            "ORDER BY c.relname"
+        ), {"pattern": f"{PARTITION_PREFIX}%"})
+        return [
+            (name, state) for name, state in result.all()
+            if PARTITION_NAME.fullmatch(name)
+        ]
+
+    async def _lock_for_maintenance(self) -> None:
+        await self.session.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID}
+        )
+
+
+def _stored(expires_at: datetime) -> datetime:
+    """
+    expires_at as the column holds it: UTC without tzinfo (it is a plain
+    timestamp), so partition days are UTC days whatever the server's zone.
+    Naive datetimes are taken to be UTC already.
+    """
+    if expires_at.tzinfo is None:
+        return expires_at
+    return expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _partition_day(name: str) -> date:
+    return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+
+
+def _sqlstate(exc: Exception) -> Optional[str]:
+    orig = getattr(exc, "orig", None)
+    return getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
 
 
 # class TokenBlocklistRepository:
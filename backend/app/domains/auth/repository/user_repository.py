@@ -55,7 +55,7 @@ class UserRepository(BaseRepository[ModelType, UserCreate, UserUpdate]):
 
         new_user = User(**user_data_dict)
 
-        new_user.password = Security.generate_password_hash(user_data_dict["password"])
+        new_user.password = await Security.generate_password_hash_async(user_data_dict["password"])
         # new_user.role = "user"
 
 
@@ -65,6 +65,11 @@ class UserRepository(BaseRepository[ModelType, UserCreate, UserUpdate]):
 
         return new_user
 
+    async def update_password_hash(self, user: User, password_hash: str) -> None:
+        user.password = password_hash
+        self.session.add(user)
+        await self.session.commit()
+
     async def update(self, user: Type[User], user_data: UserUpdate)-> UserSchema:
         try:
             
@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime, timedelta, timezone
 
 from app.config.settings import settings
@@ -9,9 +10,11 @@ from app.utils.security import Security
 from app.domains.auth.schemas.login_schema import UserLoginModel
 
 from app.domains.auth.repository.token_blocklist import  TokenBlocklistRepository
+from app.domains.auth.services.token import TokenService
 from app.domains.auth.schemas.auth import TokenResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+logger = logging.getLogger(__name__)
 
 
 class AuthService:
@@ -26,7 +29,8 @@ class AuthService:
         if user is None:
             raise InvalidCredentials()
 
-        if not Security.verify_password(login_data.password, user.password):
+        valid, new_hash = await Security.verify_and_update_password_async(login_data.password, user.password)
+        if not valid:
             raise InvalidCredentials()
 
         # Superuser has no tenant
@@ -44,10 +48,10 @@ class AuthService:
         refresh_token = Security.create_access_token(
             user_data=user_data,
             refresh=True,
-            expiry=timedelta(days=settings.REFRESH_TOKEN_EXPIRY),
+            expiry=timedelta(seconds=settings.REFRESH_TOKEN_EXPIRY),
         )
 
-        return JSONResponse(
+        response = JSONResponse(
             content={
                 "message": "Login successful",
                 "access_token": access_token,
@@ -61,10 +65,21 @@ class AuthService:
             }
         )
 
+        # PASSWORD_BCRYPT_ROUNDS changed since this hash was made: move the user
+        # onto the current cost. Done last, as a rollback would expire ``user``.
+        if new_hash is not None:
+            try:
+                await self.repository.update_password_hash(user, new_hash)
+            except Exception as e:
+                await self.repository.session.rollback()
+                logger.warning(f"Could not re-hash password for user {user_data['user_uid']}: {e}")
+
+        return response
+
     async def refresh_user_token(self, token_data: dict) -> TokenResponse:
         jti = token_data["jti"]
         tenant = token_data.get("tenant")
-        expires_at = datetime.fromtimestamp(token_data["exp"]) 
+        expires_at = datetime.fromtimestamp(token_data["exp"], tz=timezone.utc) 
 
         user_data = {
             "email": token_data["email"],
@@ -73,11 +88,12 @@ class AuthService:
         }
 
         
-        await self.blocklist_repo.add_token_to_blocklist(
+        await TokenService(self.blocklist_repo).revoke_token(
             jti=jti,
             expires_at=expires_at,
             user_id=user_data["user_id"],
-            tenant=tenant
+            tenant=tenant,
+            is_tenant_user=tenant is not None,
         )
 
         # Generate new access + refresh tokens
@@ -85,7 +101,7 @@ class AuthService:
         refresh_token = Security.create_access_token(
             user_data=user_data,
             refresh=True,
-            expiry=timedelta(days=settings.REFRESH_TOKEN_EXPIRY),
+            expiry=timedelta(seconds=settings.REFRESH_TOKEN_EXPIRY),
         )
 
         return TokenResponse(
@@ -1,17 +1,91 @@
-from datetime import datetime, timedelta
-from app.domains.auth.repository.token_blocklist import TokenBlocklistRepository
+import asyncio
+import logging
+import math
+from datetime import datetime
+from typing import List
+
+from redis.exceptions import RedisError
+
 from app.config.settings import settings
+from app.db.redis import Revocation, add_jti_to_blocklist, revocation_filter, token_in_blocklist
+from app.db.session import get_master_session
+from app.domains.auth.repository.token_blocklist import TokenBlocklistRepository
+
+logger = logging.getLogger(__name__)
 
 
 class TokenService:
+    """
+    Token revocation. Redis answers the per-request check; public.token_blocklist
+    keeps the durable record. Postgres is read instead while Redis is
+    unreachable, and until revocations written during an outage have been
+    backfilled into Redis (see run_revocation_sync).
+    """
+
     def __init__(self, repository: TokenBlocklistRepository):
         self._repository = repository
 
-    async def revoke_token(self, jti: str, expires_at: settings.JTI_EXPIRY, user_id: str, tenant_id: str) -> None:
-        await self._repository.add_to_blocklist(jti, expires_at, user_id, tenant_id)
+    async def revoke_token(
+        self,
+        jti: str,
+        expires_at: datetime,
+        user_id: str,
+        tenant: str | None = None,
+        is_tenant_user: bool = False,
+    ) -> None:
+        await self._repository.add_token_to_blocklist(jti, expires_at, user_id, tenant, is_tenant_user)
+        try:
+            await add_jti_to_blocklist(jti, tenant, expires_at)
+        except RedisError as e:
+            # Recorded in Postgres; the revocation sync copies it into Redis
+            revocation_filter.mark_redis_behind()
+            logger.warning(f"Redis blocklist unavailable, revocation of {jti} kept in Postgres only: {e}")
 
-    async def verify_token_not_blocklisted(self, jti: str) -> bool:
-        return not await self._repository.is_token_blocked(jti)
+    async def verify_token_not_blocklisted(
+        self, jti: str, tenant: str | None = None, expires_at: datetime | None = None
+    ) -> bool:
+        if not revocation_filter.redis_behind:
+            try:
+                return not await token_in_blocklist(jti, tenant)
+            except RedisError as e:
+                revocation_filter.mark_redis_behind()
+                logger.warning(f"Redis blocklist unavailable, falling back to Postgres: {e}")
+        return not await self._repository.is_token_blocked(jti, tenant, expires_at)
 
     async def cleanup_tokens(self) -> int:
-        return await self._repository.cleanup_expired_tokens()
\ No newline at end of file
+        return await self._repository.cleanup_expired_tokens()
+
+    async def maintain_partitions(self) -> None:
+        """Keep daily partitions ahead of the longest token lifetime and drop expired ones."""
+        lifetime = max(settings.ACCESS_TOKEN_EXPIRY, settings.REFRESH_TOKEN_EXPIRY)
+        days_ahead = math.ceil(lifetime / 86400) + settings.TOKEN_BLOCKLIST_PARTITIONS_AHEAD
+
+        created = await self._repository.ensure_partitions(days_ahead)
+        dropped = await self.cleanup_tokens()
+        if created or dropped:
+            logger.info(f"Token blocklist: created {len(created)} partition(s), dropped {dropped}")
+
+
+async def load_live_revocations() -> List[Revocation]:
+    """Unexpired revocations from Postgres, for backfilling Redis."""
+    async with get_master_session() as session:
+        return await TokenBlocklistRepository(session).live_revocations()
+
+
+async def maintain_token_blocklist() -> None:
+    """One maintenance pass over public.token_blocklist; logs instead of raising."""
+    try:
+        async with get_master_session() as session:
+            repository = TokenBlocklistRepository(session)
+            if not await repository.is_partitioned():
+                logger.warning("public.token_blocklist is not partitioned; run the migrations")
+                return
+            await TokenService(repository).maintain_partitions()
+    except Exception as e:
+        logger.error(f"Token blocklist maintenance failed: {e}")
+
+
+async def run_blocklist_maintenance(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await maintain_token_blocklist()
@@ -7,6 +7,7 @@ from app.domains.school.services.school import (
     SchoolService,
     SchoolCreate,
     SchoolUpdate,
+    get_school_read_service,
     get_school_service,
 )
 from app.utils.auth_dep import access_token_bearer
@@ -15,18 +16,18 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import UUID4
 from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import UUID4
-from app.utils.dependencies import get_tenant_session
-from app.config.tenant_dependencies import get_tenant_id, get_tenant_session
+from app.utils.dependencies import get_tenant_session_dep
+from app.config.tenant_dependencies import get_tenant_id
 
 school_router = APIRouter(prefix="/schools", tags=["Schools"])
 
 
-sessionDep = Annotated[AsyncSession, Depends(get_tenant_session)]
+sessionDep = Annotated[AsyncSession, Depends(get_tenant_session_dep)]
 
 
 @school_router.get("/", response_model=List[SchoolOut])
 async def get_schools(
-    service: SchoolService = Depends(get_school_service),
+    service: SchoolService = Depends(get_school_read_service),
     search_term: Optional[str] = None,
     skip: int = 0,
     limit: int = 100
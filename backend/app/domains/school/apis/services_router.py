@@ -1,12 +1,12 @@
 from typing import Annotated
 
-from app.db.session import get_master_session
 from app.domains.school.services.services_service import (
     Service,
     ServiceCreate,
     ServiceUpdate,
 )
 from app.utils.auth_dep import access_token_bearer
+from app.utils.dependencies import get_master_session_dep, get_read_session_dep
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import UUID4
 
@@ -15,7 +15,8 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 service_router = APIRouter(prefix="/services", tags=["Services"])
 
-sessionDep = Annotated[AsyncSession, Depends(get_master_session)]
+sessionDep = Annotated[AsyncSession, Depends(get_master_session_dep)]
+readSessionDep = Annotated[AsyncSession, Depends(get_read_session_dep)]
 
 
 @service_router.post("/", response_model=ServiceCreate)
@@ -38,7 +39,7 @@ async def update_service(
 
 @service_router.get("/", response_model=list[ServiceCreate])
 async def get_all_services(
-    session: sessionDep, user_details=Depends(access_token_bearer)
+    session: readSessionDep, user_details=Depends(access_token_bearer)
 ):
     _service = Service(session)
     return await _service.get_all()
@@ -1,6 +1,5 @@
-from typing import Annotated, AsyncGenerator, List
+from typing import Annotated, List
 
-from app.db.session import get_master_session
 # from app.utils.dependencies import get_master_engine
 from app.domains.school.services.tenant import (
     TenantService,
@@ -10,20 +9,23 @@ from app.domains.school.services.tenant import (
     TenantSchema,
 )
 from app.utils.auth_dep import access_token_bearer
+from app.config.settings import settings
+from app.utils.dependencies import get_master_session_dep, get_read_session_dep, request_timeout
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import UUID4
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 tenant_management_router = APIRouter(prefix="/tenants", tags=["Tenants management"])
 
-async def get_master_session_dep() -> AsyncGenerator[AsyncSession, None]:
-    async with get_master_session() as session:
-        yield session
-
 sessionDep = Annotated[AsyncSession, Depends(get_master_session_dep)]
+readSessionDep = Annotated[AsyncSession, Depends(get_read_session_dep)]
 
 
-@tenant_management_router.post("/", response_model=TenantCreate)
+@tenant_management_router.post(
+    "/",
+    response_model=TenantCreate,
+    dependencies=[Depends(request_timeout(settings.TENANT_PROVISIONING_TIMEOUT_MS))],
+)
 async def create_tenant(tenant_data: TenantCreate, session: sessionDep,
                         ):
     _tenant = TenantService(session)
@@ -44,7 +46,7 @@ async def update_tenant(
 
 @tenant_management_router.get("/", response_model=list[TenantSchema])
 async def get_all_tenants(
-    session: sessionDep, user_details=Depends(access_token_bearer)
+    session: readSessionDep, user_details=Depends(access_token_bearer)
 ) -> List[TenantSchema]:
     _tenant = TenantService(session)
     return await _tenant.get_all()
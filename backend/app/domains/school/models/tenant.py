@@ -5,7 +5,7 @@ from app.db.base_class import APIBase
 
 from datetime import datetime
 from sqlmodel import Field, Relationship
-from typing import List
+from typing import List, Optional
 # from app.domains.school.models.school import School
 
 
@@ -17,6 +17,9 @@ class Tenant(APIBase, table=True):
     subdomain: str = Field(max_length=255, unique=True)
     is_active: bool = Field(default=True)
     billing_tier: str = Field(max_length=50, default="basic")
+    shard_id: str = Field(max_length=64, default="default", index=True)
+    # Key into TENANT_DATABASE_URLS for tenants with their own database
+    database_ref: Optional[str] = Field(default=None, max_length=64)
     
     # Relationship to cached school data (optional)
     schools: List["School"] = Relationship(back_populates="tenant")
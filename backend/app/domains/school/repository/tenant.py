@@ -3,11 +3,12 @@ from uuid import UUID
 from app.utils.errors import TenantCreationException
 from app.utils.schema_utils import SchemaFactory
 from fastapi import HTTPException
-from sqlalchemy import select, text
+from sqlalchemy import func, select, text
 from app.domains.school.models.school import School
 from sqlmodel import Session
 from app.domains.school.models.tenant import Tenant
 from app.crud.base import BaseRepository
+from app.db.shards import DEDICATED_PREFIX
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Any, List, Optional, Dict
 from app.domains.school.schemas.tenant import TenantCreate, TenantUpdate, TenantSchema
@@ -27,6 +28,27 @@ class TenantRepository(BaseRepository[Tenant, TenantCreate, TenantUpdate]):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+
+    async def count_by_shard(self) -> Dict[str, int]:
+        stmt = (
+            select(Tenant.shard_id, func.count())
+            .where(Tenant.database_ref.is_(None))  # dedicated databases do not load a shard
+            .group_by(Tenant.shard_id)
+        )
+        result = await self.session.execute(stmt)
+        return dict(result.all())
+
+    async def schema_names_on(self, shard_id: str) -> List[str]:
+        """Schemas of the tenants stored on a shard, or on a dedicated database ("dedicated:<ref>")."""
+        if shard_id.startswith(DEDICATED_PREFIX):
+            condition = Tenant.database_ref == shard_id[len(DEDICATED_PREFIX):]
+        else:
+            condition = (Tenant.shard_id == shard_id) & Tenant.database_ref.is_(None)
+        result = await self.session.execute(
+            select(Tenant.schema_name).where(condition).order_by(Tenant.schema_name)
+        )
+        return list(result.scalars().all())
+
     
     async def get_all(self) -> List[Optional[TenantSchema]]:
         statement = select(Tenant)
@@ -15,7 +15,8 @@ class TenantBase(SQLModel):
     billing_tier: str
 
 class TenantCreate(TenantBase):
-    pass
+    shard_id: Optional[str] = None  # picked by load when omitted
+    database_ref: Optional[str] = None  # dedicated database; overrides shard_id
 
 class TenantUpdate(TenantBase):
    
@@ -26,6 +27,8 @@ class TenantUpdate(TenantBase):
 
 class TenantRead(TenantBase):
     id: UUID
+    shard_id: str
+    database_ref: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -10,20 +10,24 @@ from app.domains.school.repository.school import SchoolRepository
 from app.domains.school.services.tenant import TenantService
 from app.db.session import get_tenant_session
 from app.config.tenant_dependencies import get_tenant_id
-from app.utils.dependencies import get_tenant_session_dep
+from app.utils.dependencies import get_read_session_dep, get_tenant_session_dep
+from app.config.tenant_context import get_tenant_context
+from app.db.tenant_directory import TenantRecord
 from fastapi import Request
 
 logger = logging.getLogger(__name__)
 
 class SchoolService:
-    def __init__(self, session: AsyncSession, tenant_id: UUID):
+    def __init__(self, session: AsyncSession, tenant_id: UUID, tenant: Optional[TenantRecord] = None):
         self.session = session
         self.tenant_id = tenant_id
+        self.tenant = tenant
         self.school_repo = SchoolRepository(session)
         self.tenant_repo = TenantRepository(session)
 
     async def _validate_tenant(self) -> None:
-        tenant = await self.tenant_repo.get(self.tenant_id)
+        # Use the request's resolved tenant when we have it; query otherwise
+        tenant = self.tenant or await self.tenant_repo.get(self.tenant_id)
         if not tenant or not tenant.is_active:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -159,4 +163,16 @@ async def get_school_service(
     session: AsyncSession = Depends(get_tenant_session_dep),
     tenant_id: UUID = Depends(get_tenant_id)
 ) -> SchoolService:
-    return SchoolService(session=session, tenant_id=tenant_id)
+    ctx = get_tenant_context(request)
+    tenant = ctx.tenant if ctx is not None and ctx.tenant_id == tenant_id else None
+    return SchoolService(session=session, tenant_id=tenant_id, tenant=tenant)
+
+
+
+async def get_school_read_service(
+    request: Request,
+    session: AsyncSession = Depends(get_read_session_dep),
+    tenant_id: UUID = Depends(get_tenant_id)
+) -> SchoolService:
+    """SchoolService on a read-only (replica) session, for list endpoints."""
+    return await get_school_service(request, session=session, tenant_id=tenant_id)
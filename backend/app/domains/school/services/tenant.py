@@ -9,11 +9,12 @@ from sqlmodel import Session
 from app.domains.school.schemas.tenant import TenantCreate, TenantUpdate, TenantRead, TenantSchema
 from app.domains.school.repository.tenant import TenantRepository
 from app.domains.school.models.tenant import Tenant
-from app.db.session import get_master_session
+from app.db.session import tenant_directory
+from app.db.shards import DEFAULT_SHARD, dedicated_shard
 from app.utils.tenant import create_schema, create_schema_tables
 from app.domains.auth.schemas.user_schema import UserCreate
 from app.db.session import get_tenant_session
-from app.utils.dependencies import get_master_engine
+from app.utils.dependencies import get_master_session_dep
 from app.domains.auth.models.tenant_user import TenantUser
 
 from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
@@ -42,14 +43,23 @@ class TenantService:
         try:
             schema_name = tenant_data.schema_name  # must now be passed explicitly
 
-            # Step 1: Bootstrap schema if needed
-            bootstrapper = TenantBootstrapper(get_master_engine())
-            await bootstrapper.bootstrap_if_needed(schema_name)
+            # Step 1: Bootstrap schema if needed: in the tenant's dedicated
+            # database, else on the least-loaded shard unless the caller pinned one
+            if tenant_data.database_ref:
+                shard_id, target = DEFAULT_SHARD, dedicated_shard(tenant_data.database_ref)
+            else:
+                shard_id = tenant_data.shard_id or await TenantBootstrapper.choose_shard(self.session)
+                target = shard_id
+            async with TenantBootstrapper.for_shard(target) as bootstrapper:
+                await bootstrapper.bootstrap_if_needed(schema_name)
 
             # Step 2: Create tenant
-            tenant = await self.repository.create(tenant_data)
+            tenant = await self.repository.create(tenant_data.model_copy(update={"shard_id": shard_id}))
             await self.session.commit()
 
+            # Drop any cached "unknown subdomain" entry for the new tenant
+            tenant_directory.invalidate(tenant_id=tenant.id, subdomain=tenant.subdomain)
+
             return TenantRead.from_orm(tenant)
 
         except Exception as e:
@@ -85,10 +95,14 @@ class TenantService:
             if await self.repository.get_by_subdomain(update_data.subdomain):
                 raise HTTPException(400, "New subdomain already in use")
 
+        old_subdomain = tenant.subdomain
         updated_tenant = await self.repository.update(db_obj=tenant, obj_in=update_data)
 
         await self.session.commit()
 
+        tenant_directory.invalidate(tenant_id=tenant_id, subdomain=old_subdomain)
+        tenant_directory.invalidate(subdomain=updated_tenant.subdomain)
+
         return TenantRead.from_orm(updated_tenant)
 
     async def deactivate_tenant(self, tenant_id: UUID) -> bool:
@@ -98,6 +112,8 @@ class TenantService:
             raise HTTPException(404, "Tenant not found")
 
         await self.repository.update(db_obj=tenant, obj_in={"is_active": False})
+
+        tenant_directory.invalidate(tenant_id=tenant_id, subdomain=tenant.subdomain)
         return True
 
     async def list_tenants(
@@ -122,5 +138,5 @@ class TenantService:
         )
 
 # FastAPI Dependency Injection
-def get_tenant_service(session: AsyncSession = Depends(get_master_session)) -> TenantService:
+def get_tenant_service(session: AsyncSession = Depends(get_master_session_dep)) -> TenantService:
     return TenantService(session)
\ No newline at end of file
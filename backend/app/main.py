@@ -1,19 +1,26 @@
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
-from requests import Request
-
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.settings import settings 
 from app.db.init_db import init_db
 
 from fastapi.routing import APIRoute
 from app.utils.errors import register_all_errors
-from app.db.session import clear_engine_cache
+from app.db.redis import run_revocation_sync
+from app.db.session import clear_engine_cache, tenant_engines
+from app.db.warmup import warm_up_tenants
+from app.domains.auth.services.token import (
+    load_live_revocations,
+    maintain_token_blocklist,
+    run_blocklist_maintenance,
+)
 from app.middleware.tenant import TenantSubdomainMiddleware
 from app.apis.global_router import global_router
 from app.apis.tenant_router import tenant_router
+from app.config.tenant_dependencies import require_tenant_path
 
 
 from app.apis.openai_routes import get_docs_router
@@ -29,7 +36,28 @@ async def life_span(app: FastAPI):
     print("server is starting ...")
     await clear_engine_cache()
     await init_db()
+    await maintain_token_blocklist()
+    if settings.TENANT_WARMUP_ENABLED:
+        await warm_up_tenants(
+            limit=settings.TENANT_WARMUP_LIMIT,
+            concurrency=settings.TENANT_WARMUP_CONCURRENCY,
+            timeout=settings.TENANT_WARMUP_TIMEOUT,
+        )
+    engine_sweeper = asyncio.create_task(
+        tenant_engines.run_idle_sweeper(settings.TENANT_ENGINE_SWEEP_INTERVAL)
+    )
+    revocation_sync = asyncio.create_task(
+        run_revocation_sync(settings.TOKEN_BLOCKLIST_PURGE_INTERVAL, load_live_revocations)
+    )
+    blocklist_maintenance = asyncio.create_task(
+        run_blocklist_maintenance(settings.TOKEN_BLOCKLIST_MAINTENANCE_INTERVAL)
+    )
     yield
+    for task in (engine_sweeper, revocation_sync, blocklist_maintenance):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await clear_engine_cache()
     print("server has been stopped")
 
 
@@ -70,19 +98,10 @@ app.include_router(get_docs_router(app))
 # Global routes (tenant registration, auth)
 app.include_router(global_router, prefix=f"{settings.API_V1_STR}")
 
-# Tenant-specific routes (school logic)
-# app.include_router(tenant_router, prefix=f"{settings.API_V1_STR}/tenants")
-
-@app.middleware("http")
-async def tenant_routes_middleware(request: Request, call_next):
-    response = await call_next(request)
-    
-    # Only mount tenant router if we're in tenant context
-    if getattr(request.state, "context", None) == "tenant":
-        tenant_id = request.state.tenant_id
-        app.include_router(
-            tenant_router,
-            prefix=f"{settings.API_V1_STR}/tenants/{tenant_id}"
-        )
-    
-    return response
\ No newline at end of file
+# Tenant-specific routes (school logic), mounted once; the {tenant} segment
+# must match the tenant resolved from the host by the middleware.
+app.include_router(
+    tenant_router,
+    prefix=f"{settings.API_V1_STR}/tenants/{{tenant}}",
+    dependencies=[Depends(require_tenant_path)],
+)
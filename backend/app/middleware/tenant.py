@@ -1,54 +1,146 @@
 from app.config.settings import settings
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.responses import JSONResponse
-from urllib.parse import urlparse
-from app.db.session import get_master_session, get_tenant_session
-from sqlalchemy import text
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.db.lazy_session import LazySession
+from app.db.session import (
+    MasterAsyncSessionLocal,
+    new_tenant_session,
+    request_deadline,
+    statement_timeout_ms,
+    tenant_directory,
+    tenant_quotas,
+)
+from app.utils.errors import TENANT_OVER_QUOTA_DETAIL, TenantOverQuota
+from app.config.tenant_context import TenantContext
 import logging
 
 logger = logging.getLogger(__name__)
 
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
-class TenantSubdomainMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, base_domain: str, global_prefix: str):
-        super().__init__(app)
+
+class TenantSubdomainMiddleware:
+    """
+    Pure ASGI middleware that resolves the global/tenant context from the host.
+
+    Sets ``context``, ``tenant_id``, ``tenant_context`` and a lazily-created
+    ``session`` on the request state. The session is only built if something
+    in the request actually uses it, and is closed once the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, base_domain: str, global_prefix: str):
+        self.app = app
         self.base_domain = base_domain
         self.global_prefix = global_prefix
 
-    async def dispatch(self, request: Request, call_next):
-        host = request.headers.get("host", "")
-        
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        host = Headers(scope=scope).get("host", "")
+
+        if settings.READ_REPLICA_URLS and scope.get("method", "GET") not in SAFE_METHODS:
+            send = self._stick_reads_to_primary(send)
+
         # Extract subdomain (api.edutenant.localhost -> "api")
         subdomain = host.replace(f".{self.base_domain}", "").split(":")[0].strip().lower()
+        state = scope.setdefault("state", {})
 
         # Global context (api.edutenant.localhost)
         if subdomain == self.global_prefix:
-            request.state.context = "global"
-            request.state.tenant_id = None
+            state["context"] = "global"
+            state["tenant_id"] = None
+            state["tenant_context"] = TenantContext(context="global")
             logger.debug("Global context detected")
-            
-            async with get_master_session() as session:
-                request.state.session = session
-                return await call_next(request)
+
+            state["deadline"] = request_deadline(statement_timeout_ms())
+            session = self._master_session(state)
+            await self._call_with_session(session, session, scope, receive, send)
+            return
 
         # Tenant context (tenant1.edutenant.localhost)
         if "." in subdomain:  # Invalid if contains multiple dots
-            return JSONResponse(status_code=400, content={"detail": "Invalid subdomain format"})
+            response = JSONResponse(status_code=400, content={"detail": "Invalid subdomain format"})
+            await response(scope, receive, send)
+            return
 
-        # Verify tenant exists
-        async with get_master_session() as session:
-            tenant_exists = await session.scalar(
-                text("SELECT 1 FROM public.tenants WHERE subdomain = :subdomain"),
-                {"subdomain": subdomain}
-            )
-            if not tenant_exists:
-                return JSONResponse(status_code=404, content={"detail": f"Tenant '{subdomain}' not found"})
+        # Verify tenant exists (served from the tenant directory cache when warm)
+        tenant = await tenant_directory.resolve(subdomain)
+        if not tenant:
+            response = JSONResponse(status_code=404, content={"detail": f"Tenant '{subdomain}' not found"})
+            await response(scope, receive, send)
+            return
 
-        request.state.tenant_id = subdomain
-        request.state.context = "tenant"
+        state["tenant_id"] = subdomain
+        state["context"] = "tenant"
+        state["tenant_context"] = TenantContext(context="tenant", subdomain=subdomain, tenant=tenant)
         logger.debug(f"Tenant context detected: '{subdomain}'")
 
-        async with get_tenant_session(subdomain) as tenant_session:
-            request.state.session = tenant_session
-            return await call_next(request)
+        # Requests beyond the tenant's tier limit queue here, then get a 503
+        try:
+            async with tenant_quotas.acquire(tenant.schema_name, tenant.billing_tier):
+                # The database budget starts once a slot is free, not while queued
+                state["deadline"] = request_deadline(statement_timeout_ms(tenant.billing_tier))
+                session = LazySession(
+                    lambda: new_tenant_session(
+                        tenant.schema_name, tenant.billing_tier, state["deadline"], tenant.effective_shard
+                    )
+                )
+                await self._call_with_session(session, self._master_session(state), scope, receive, send)
+        except TenantOverQuota:
+            response = JSONResponse(
+                status_code=503,
+                content=TENANT_OVER_QUOTA_DETAIL,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+
+    async def _call_with_session(
+        self,
+        session: LazySession,
+        master_session: LazySession,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        # One lazy session per database for the whole request: route
+        # dependencies and TokenBearer reuse these instead of opening their own.
+        # In the global context both names point at the same master session.
+        scope["state"]["session"] = session
+        scope["state"]["master_session"] = master_session
+        sessions = {id(s): s for s in (session, master_session)}.values()
+        failed = False
+        try:
+            await self.app(scope, receive, send)
+        except BaseException:
+            # Including CancelledError (client gone, server shutting down)
+            failed = True
+            raise
+        finally:
+            for s in sessions:
+                await s.aclose(rollback=failed)
+
+    @staticmethod
+    def _master_session(state: dict) -> LazySession:
+        def create():
+            info = {"deadline": state["deadline"]} if state["deadline"] is not None else {}
+            return MasterAsyncSessionLocal(info=info)
+
+        return LazySession(create)
+
+    @staticmethod
+    def _stick_reads_to_primary(send: Send) -> Send:
+        """Mark the client so its reads skip replicas for a while after a write."""
+        cookie = (
+            f"{settings.READ_PRIMARY_COOKIE_NAME}=1; "
+            f"Max-Age={settings.READ_PRIMARY_STICKY_SECONDS}; Path=/; HttpOnly; SameSite=Lax"
+        )
+
+        async def wrapped(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        return wrapped
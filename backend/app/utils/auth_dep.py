@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Annotated, Any, List
 
 from fastapi import Depends, Request, status
@@ -9,15 +10,15 @@ from app.domains.auth.repository.token_blocklist import TokenBlocklistRepository
 from app.domains.auth.services.token import TokenService
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.session import db_session_dependency
+from app.utils.dependencies import get_master_session_dep, master_session
 from app.domains.auth.models.users import User
-from app.db.redis import token_in_blocklist
 
 # from src.db.redis import token_in_blocklist
 
 from app.domains.auth.services.user_service import UserService
 from app.domains.auth.repository.user_repository import UserRepository
 from app.utils.security import Security
+from app.config.tenant_context import get_tenant_context
 from app.utils.errors import (
     InvalidToken,
     RefreshTokenRequired,
@@ -27,7 +28,8 @@ from app.utils.errors import (
 )
 
 # sessionDep = Annotated[AsyncSession, Depends(get_master_session)]
-sessionDep = Annotated[AsyncSession, Depends(db_session_dependency)]
+# Blocklist and users live in the public schema, on the master database
+sessionDep = Annotated[AsyncSession, Depends(get_master_session_dep)]
 
 
 class TokenBearer(HTTPBearer):
@@ -37,25 +39,31 @@ class TokenBearer(HTTPBearer):
     async def __call__(self, request: Request) -> HTTPAuthorizationCredentials | None:
         creds = await super().__call__(request)
         token = creds.credentials
+        # Decoded once per request; repeat tokens come from the verified-claims cache
         token_data = Security.decode_token(token)
 
-        if not self.token_valid(token):
+        if not self.token_valid(token_data):
             raise InvalidToken()
 
-        
-        token_repo = TokenBlocklistRepository(request.state.session)
-        token_service = TokenService(token_repo)
-
-        if not await token_service.verify_token_not_blocklisted(token_data["jti"]):
+        # Tokens minted for one tenant are not valid on another tenant's host
+        ctx = get_tenant_context(request)
+        token_tenant = token_data.get("tenant")
+        if ctx is not None and ctx.is_tenant and token_tenant and token_tenant != ctx.subdomain:
             raise InvalidToken()
 
+        # Outside TenantSubdomainMiddleware there is no request session to reuse
+        async with master_session(request) as session:
+            token_service = TokenService(TokenBlocklistRepository(session))
+            if not await token_service.verify_token_not_blocklisted(
+                token_data["jti"], token_tenant, datetime.fromtimestamp(token_data["exp"], tz=timezone.utc)
+            ):
+                raise InvalidToken()
+
         self.verify_token_data(token_data)
 
         return token_data
 
-    def token_valid(self, token: str) -> bool:
-        token_data = Security.decode_token(token)
-
+    def token_valid(self, token_data: dict | None) -> bool:
         return token_data is not None
 
     def verify_token_data(self, token_data):
@@ -91,14 +99,8 @@ async def get_current_user(
     session: sessionDep,
     token_data: dict = Depends(AccessTokenBearer()),
 ) -> User:
-    tenant = token_data.get("tenant")  # May be None for superusers
-    jti = token_data.get("jti")
-
-    blocklist_repo = TokenBlocklistRepository(session)
-    if await blocklist_repo.is_token_blocked(jti, tenant):
-        raise HTTPException(status_code=401, detail="Token has been revoked")
-
-    user_email = token_data["user"]["email"]
+    # AccessTokenBearer has already rejected revoked tokens
+    user_email = token_data["email"]
     user_service = UserService(session)
     user = await user_service.repository.get_user_by_email(user_email)
 
@@ -0,0 +1,69 @@
+"""
+Measure bcrypt on this host and recommend PASSWORD_BCRYPT_ROUNDS.
+
+    python -m app.utils.calibrate_password_hash --target-ms 250
+
+Run it on the machine (or instance type) that serves logins. The
+recommendation is the highest cost whose median hash time stays within the
+target; with PASSWORD_HASH_WORKERS threads that also bounds how many logins
+per second one worker process can verify.
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict
+
+from passlib.hash import bcrypt
+
+from app.config.settings import settings
+
+MIN_ROUNDS = 8
+MAX_ROUNDS = 16
+
+
+def measure(rounds: int, samples: int) -> float:
+    """Median seconds for one bcrypt hash at ``rounds``."""
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration-password")
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate(target_seconds: float, samples: int) -> Dict[int, float]:
+    """Median hash time per cost, stopping once a cost is well past the target."""
+    results = {}
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        results[rounds] = measure(rounds, samples)
+        if results[rounds] > target_seconds * 2:
+            break
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=250.0, help="acceptable time for one hash")
+    parser.add_argument("--samples", type=int, default=5, help="hashes timed per cost")
+    args = parser.parse_args()
+
+    target = args.target_ms / 1000
+    results = calibrate(target, args.samples)
+    within = [rounds for rounds, seconds in results.items() if seconds <= target]
+    recommended = max(within) if within else MIN_ROUNDS
+
+    print(f"{'rounds':>6}  {'median ms':>9}  {'logins/s per process':>20}")
+    for rounds, seconds in results.items():
+        marker = "  <- current" if rounds == settings.PASSWORD_BCRYPT_ROUNDS else ""
+        throughput = settings.PASSWORD_HASH_WORKERS / seconds
+        print(f"{rounds:>6}  {seconds * 1000:>9.1f}  {throughput:>20.1f}{marker}")
+
+    print(f"\nRecommended: PASSWORD_BCRYPT_ROUNDS={recommended} (target {args.target_ms:.0f} ms)")
+    if recommended != settings.PASSWORD_BCRYPT_ROUNDS:
+        print("Existing hashes move to the new cost as their users next log in.")
+
+
+if __name__ == "__main__":
+    main()
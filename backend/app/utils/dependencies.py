@@ -1,19 +1,117 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import Request
+from sqlalchemy import text
 from app.db.session import master_async_engine
 from typing import Annotated, AsyncGenerator, List
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from app.db.session import db_session_dependency, get_master_session, get_tenant_session
+from app.db.session import (
+    db_session_dependency,
+    get_master_session,
+    get_read_session,
+    get_tenant_session,
+    request_deadline,
+)
+from app.config.settings import settings
+from app.config.tenant_context import get_tenant_context
+from app.db.lazy_session import LazySession
 
 def get_master_engine():
     return master_async_engine
 
 
-async def get_master_session_dep() -> AsyncGenerator[AsyncSession, None]:
-    async with get_master_session() as session:
+def get_request_session(request: Request, master: bool = False) -> Optional[LazySession]:
+    """
+    The lazy session TenantSubdomainMiddleware opened for this request.
+
+    ``master=False`` gives the session for the request's own context (tenant
+    or global); ``master=True`` the master DB session. None outside the
+    middleware. The middleware closes these, so callers must not.
+    """
+    return getattr(request.state, "master_session" if master else "session", None)
+
+
+@asynccontextmanager
+async def master_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Master DB session, reusing the middleware's when present."""
+    session = get_request_session(request, master=True)
+    if session is not None:
         yield session
+        return
 
+    async with get_master_session(getattr(request.state, "deadline", None)) as session:
+        yield session
 
 
-async def get_tenant_session_dep(request: Request) -> AsyncGenerator[AsyncSession, None]:
+async def get_master_session_dep(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with master_session(request) as session:
+        yield session
+
+
+@asynccontextmanager
+async def context_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for the request's context, reusing the middleware's when present."""
+    session = get_request_session(request)
+    if session is not None:
+        yield session
+        return
+
     async with db_session_dependency(request) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_tenant_session_dep(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with context_session(request) as session:
+        yield session
+
+
+async def get_read_session_dep(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read-only session for list endpoints, routed to a replica when available.
+
+    Clients that wrote recently carry the read-primary cookie (set by the
+    tenant middleware) and keep reading from the primary until it expires.
+    """
+    if request.cookies.get(settings.READ_PRIMARY_COOKIE_NAME):
+        async with context_session(request) as session:
+            yield session
+        return
+
+    ctx = get_tenant_context(request)
+    if ctx is not None:
+        schema_name, billing_tier, shard_id = ctx.schema_name, ctx.billing_tier, ctx.shard_id
+    else:
+        schema_name = billing_tier = shard_id = None
+
+    deadline = getattr(request.state, "deadline", None)
+    async with get_read_session(schema_name, billing_tier, deadline, shard_id) as session:
+        yield session
+
+
+def request_timeout(timeout_ms: int):
+    """
+    Route dependency that replaces the tier's database deadline for one route.
+
+    Use as ``dependencies=[Depends(request_timeout(2000))]``; 0 disables the
+    deadline. Applies to sessions opened after it runs, and to the request's
+    lazy sessions (tenant and master) if they are already open; an open
+    transaction gets the new statement_timeout straight away.
+    """
+    async def set_deadline(request: Request) -> None:
+        deadline = request_deadline(timeout_ms)
+        request.state.deadline = deadline
+
+        # In the global context both names point at the same session
+        sessions = (get_request_session(request), get_request_session(request, master=True))
+        for session in {id(s): s for s in sessions if s is not None}.values():
+            if not session.is_open:
+                continue  # created from request.state.deadline when first used
+            if deadline is None:
+                session.info.pop("deadline", None)
+            else:
+                session.info["deadline"] = deadline
+            if session.in_transaction():
+                await session.execute(text(f"SET LOCAL statement_timeout = {max(timeout_ms, 0)}"))
+
+    return set_deadline
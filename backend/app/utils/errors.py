@@ -6,6 +6,8 @@ from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.db.metrics import statement_timeouts
+
 
 class EdutenantException(Exception):
     """This is the base class for all bookly errors"""
@@ -82,12 +84,64 @@ class UserNotFound(EdutenantException):
     pass
 
 
+class TenantOverQuota(EdutenantException):
+    """Tenant has used all the concurrent requests its billing tier allows"""
+
+    pass
+
+
+class RequestDeadlineExceeded(EdutenantException):
+    """Request ran out of time for its database work"""
+
+    pass
+
+
+class PasswordHashingBusy(EdutenantException):
+    """Too many password hashes/verifications already queued"""
+
+    pass
+
+
 class AccountNotVerified(Exception):
     """Account not yet verified"""
 
     pass
 
 
+TENANT_OVER_QUOTA_DETAIL = {
+    "message": "Too many concurrent requests for this tenant",
+    "resolution": "Please retry shortly",
+    "error_code": "tenant_over_quota",
+}
+
+
+PASSWORD_HASHING_BUSY_DETAIL = {
+    "message": "Too many sign-ins in progress",
+    "resolution": "Please retry shortly",
+    "error_code": "password_hashing_busy",
+}
+
+
+REQUEST_DEADLINE_DETAIL = {
+    "message": "The request took too long to complete",
+    "error_code": "request_timeout",
+}
+
+# Postgres query_canceled, raised when statement_timeout fires
+QUERY_CANCELED_SQLSTATE = "57014"
+
+
+def is_statement_timeout(exc: Exception) -> bool:
+    orig = getattr(exc, "orig", None)
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate == QUERY_CANCELED_SQLSTATE
+
+
+def record_statement_timeout(request: Request) -> None:
+    tenant = getattr(request.state, "tenant_id", None) or "global"
+    statement_timeouts[tenant] = statement_timeouts.get(tenant, 0) + 1
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -235,6 +289,30 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        TenantOverQuota,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail=TENANT_OVER_QUOTA_DETAIL,
+        ),
+    )
+
+    app.add_exception_handler(
+        PasswordHashingBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail=PASSWORD_HASHING_BUSY_DETAIL,
+        ),
+    )
+
+    app.add_exception_handler(
+        RequestDeadlineExceeded,
+        create_exception_handler(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            initial_detail=REQUEST_DEADLINE_DETAIL,
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
         return JSONResponse(
@@ -247,6 +325,12 @@ def register_all_errors(app: FastAPI):
 
     @app.exception_handler(SQLAlchemyError)
     async def database__error(request, exc):
+        if is_statement_timeout(exc):
+            record_statement_timeout(request)
+            return JSONResponse(
+                content=REQUEST_DEADLINE_DETAIL,
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
         print(str(exc))
         return JSONResponse(
             content={
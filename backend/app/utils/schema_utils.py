@@ -14,8 +14,11 @@ logger = logging.getLogger(__name__)
 
 
 class SchemaFactory:
-    def __init__(self, schema_name: str):
+    def __init__(self, schema_name: str, public_foreign_keys: bool = True):
         self.schema_name = schema_name
+        # False for shards without the public schema: references to public
+        # tables are kept as plain columns instead of foreign keys.
+        self.public_foreign_keys = public_foreign_keys
         self.source_metadata = APIBase.metadata
         self.cloned_metadata = MetaData()
         self.table_map: dict[str, object] = {}
@@ -28,6 +31,8 @@ class SchemaFactory:
         self._clone_schema_less_tables()
         self._attach_public_tables()
         self._fix_foreign_keys()
+        if not self.public_foreign_keys:
+            self._drop_public_foreign_keys()
         
         return self.cloned_metadata, self.table_map
 
@@ -51,6 +56,13 @@ class SchemaFactory:
 
 
 
+    def _drop_public_foreign_keys(self):
+        for table in self.table_map.values():
+            for fk in [fk for fk in table.foreign_keys if fk.column.table.schema == "public"]:
+                table.foreign_keys.discard(fk)
+                fk.parent.foreign_keys.discard(fk)
+                table.constraints.discard(fk.constraint)
+
     # def _attach_public_tables(self):
     #     self.cloned_metadata._add_table("users", "public", User.__table__)
     #     self.cloned_metadata._add_table("tenants", "public", Tenant.__table__)
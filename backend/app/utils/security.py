@@ -1,22 +1,183 @@
+import asyncio
+import hashlib
 import logging
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional, Tuple, TypeVar
 
 # from jose import JWTError, jwt
 import jwt
 from app.config.settings import settings
+from app.db.metrics import Histogram
 from app.domains.auth.models.users import User
+from app.utils.errors import PasswordHashingBusy
 from fastapi import Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min == max == default, so needs_update() flags any hash made at another cost
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
+class VerifiedClaimsCache:
+    """
+    LRU of claims from tokens whose signature already verified, keyed by a
+    SHA-256 digest of the token so raw tokens are never held in memory.
+
+    An entry lives until the token's exp (capped at ttl), so a cached token
+    can never outlive its expiry. Only successful decodes are cached; a bad
+    token always goes through full verification. Revocation is unaffected:
+    the blocklist is still checked on every request.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers get their own copy; the cached claims stay pristine
+        return dict(claims)
+
+    def put(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return
+
+        expires_at = min(float(exp), time.time() + self.ttl)
+        key = self._key(token)
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.max_size:
+            self._entries.popitem(last=False)
+        self._entries[key] = (expires_at, dict(claims))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+
+verified_claims = VerifiedClaimsCache(
+    max_size=settings.TOKEN_CLAIMS_CACHE_SIZE,
+    ttl=settings.TOKEN_CLAIMS_CACHE_TTL,
+)
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool instead of the event loop.
+
+    bcrypt releases the GIL, so other requests keep being served while a
+    hash runs. At most ``workers`` hashes run at once and ``max_pending``
+    more may wait; past that a caller waits up to ``queue_timeout`` for a
+    slot and then gets PasswordHashingBusy (503) rather than piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.queue_wait = Histogram()
+        self.run_time = Histogram()
+        self.in_flight = 0
+        self.rejections = 0
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify, and when the hash is at an outdated cost also return a fresh one."""
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.max_pending)
+
+        submitted = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejections += 1
+            raise PasswordHashingBusy()
+
+        self.in_flight += 1
+        job = asyncio.get_running_loop().run_in_executor(self._executor, self._timed, fn, *args)
+        # The slot is released when the thread is done with the hash, not when
+        # the caller stops waiting: a cancelled login's hash still occupies it.
+        job.add_done_callback(self._finished)
+
+        started, result = await asyncio.shield(job)
+        self.queue_wait.observe(started - submitted)
+        self.run_time.observe(time.perf_counter() - started)
+        return result
+
+    def _finished(self, job: asyncio.Future) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _timed(fn: Callable[..., T], *args) -> Tuple[float, T]:
+        return time.perf_counter(), fn(*args)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "rejections": self.rejections,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "run_seconds": self.run_time.snapshot(),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+)
+
+
 class Security:
     @staticmethod
     def get_user_by_email(username: str, db: Session):
@@ -29,6 +190,16 @@ class Security:
     def verify_password(plain_password, hashed_password) -> bool:
         return pwd_context.verify(plain_password, hashed_password)
 
+    @staticmethod
+    async def verify_password_async(plain_password, hashed_password) -> bool:
+        """verify_password off the event loop; use this from request handlers."""
+        return await password_hasher.verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def verify_and_update_password_async(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash needs a cost update."""
+        return await password_hasher.verify_and_update(plain_password, hashed_password)
+
     # function to authenticate user
     @staticmethod
     def authenticate_user(username: str, password: str, db: Session):
@@ -45,6 +216,10 @@ class Security:
         hash = pwd_context.hash(password)
         return hash
 
+    @staticmethod
+    async def generate_password_hash_async(password: str) -> str:
+        return await password_hasher.hash(password)
+
     @staticmethod
     def create_access_token(
         user_data: dict,
@@ -73,18 +248,25 @@ class Security:
     # decode token
     @staticmethod
     def decode_token(token: str) -> dict:
+        claims = verified_claims.get(token)
+        if claims is not None:
+            return claims
+
         try:
-            return jwt.decode(
+            claims = jwt.decode(
                 token,
                 key=settings.SECRET_KEY,
                 algorithms=[settings.JWT_ALGORITHM]
             )
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token expired")
-        except jwt.JWTError:
+        except jwt.InvalidTokenError:
             logging.error("Token decode failed", exc_info=True)
             return None
 
+        verified_claims.put(token, claims)
+        return claims
+
     # Generate reset password token function
     @staticmethod
     def generate_reset_password_token(expires: timedelta = None) -> str:
@@ -103,7 +285,7 @@ class Security:
                 algorithms=[settings.ALGORITHM],
             )
             return User(email=payload.get("email"))
-        except jwt.JWTError:
+        except jwt.InvalidTokenError:
             raise HTTPException(status_code=401, detail="Invalid token")
 
     # Generate refresh access token function
@@ -1,15 +1,46 @@
 # app/core/tenant_bootstrapper.py
 
-from sqlalchemy.ext.asyncio import AsyncEngine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy import text, MetaData
+from sqlalchemy.pool import NullPool
+from app.config.settings import settings
+from app.db.base_class import APIBase
+from app.db.session import master_async_engine
+from app.db.shards import hosts_public_schema, least_loaded_shard, shard_url
+from app.db.tenant_migrations import stamp_tenant_schema
+from app.domains.school.repository.tenant import TenantRepository
 from app.utils.schema_utils import SchemaFactory
 import logging
 
 logger = logging.getLogger(__name__)
 
 class TenantBootstrapper:
-    def __init__(self, engine: AsyncEngine):
+    def __init__(self, engine: AsyncEngine, public_foreign_keys: bool = True):
         self.engine = engine
+        self.public_foreign_keys = public_foreign_keys
+
+    @staticmethod
+    async def choose_shard(session: AsyncSession) -> str:
+        """Shard for a new tenant: the one with the fewest tenants in public.tenants."""
+        return least_loaded_shard(await TenantRepository(session).count_by_shard())
+
+    @classmethod
+    @asynccontextmanager
+    async def for_shard(cls, shard_id: str) -> AsyncIterator["TenantBootstrapper"]:
+        """Bootstrapper working on a shard's database."""
+        if hosts_public_schema(shard_id):
+            yield cls(master_async_engine)
+            return
+
+        # Other shards have no public schema, so no foreign keys into it
+        engine = create_async_engine(shard_url(shard_id), poolclass=NullPool)
+        try:
+            yield cls(engine, public_foreign_keys=False)
+        finally:
+            await engine.dispose()
 
     async def schema_exists(self, schema_name: str) -> bool:
         async with self.engine.connect() as conn:
@@ -30,10 +61,25 @@ class TenantBootstrapper:
         async with self.engine.begin() as conn:
             await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema_name}"'))
 
-        schema_factory = SchemaFactory(schema_name)
-        metadata, _ = schema_factory.clone()
+        if settings.TENANT_ENGINE_MODE == "translate" and self.public_foreign_keys:
+            # Same schema_translate_map the sessions use; no per-schema MetaData copy
+            tenant_tables = [t for t in APIBase.metadata.tables.values() if t.schema is None]
+            async with self.engine.begin() as conn:
+                await conn.execution_options(schema_translate_map={None: schema_name})
+                await conn.run_sync(
+                    lambda sync_conn: APIBase.metadata.create_all(sync_conn, tables=tenant_tables)
+                )
+        else:
+            schema_factory = SchemaFactory(schema_name, public_foreign_keys=self.public_foreign_keys)
+            metadata, table_map = schema_factory.clone()
+            # Only the tenant's own tables; public ones stay on the master database
+            tables = None if self.public_foreign_keys else list(table_map.values())
+
+            async with self.engine.begin() as conn:
+                await conn.run_sync(lambda sync_conn: metadata.create_all(sync_conn, tables=tables))
 
+        # Built from the current models, so tenant migrations start after this point
         async with self.engine.begin() as conn:
-            await conn.run_sync(metadata.create_all)
+            await conn.run_sync(stamp_tenant_schema, schema_name)
 
         logger.info(f"Initialized schema and tables for '{schema_name}'")
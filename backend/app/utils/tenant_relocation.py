@@ -0,0 +1,414 @@
+# app/utils/tenant_relocation.py
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import Table, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config.settings import settings
+from app.db.session import get_master_session, tenant_directory, tenant_engines
+from app.db.shards import hosts_public_schema, shard_url
+from app.db.tenant_directory import TenantRecord
+from app.domains.school.models.tenant import Tenant
+from app.utils.schema_utils import SchemaFactory
+from app.utils.tenant_bootstrapper import TenantBootstrapper
+
+logger = logging.getLogger(__name__)
+
+COPY_QUEUE_CHUNKS = 8
+UPSERT_BATCH_SIZE = 500
+# Writes to the source are logged here by trigger while a relocation runs
+CHANGE_LOG = "_relocation_changes"
+CHANGE_TRIGGER = "_relocation_log_change"
+# Rejects writes to the old schema once the tenant has moved
+MOVED_TRIGGER = "_relocation_moved"
+
+
+@dataclass
+class RelocationProgress:
+    """Live status of one relocation, as reported by /internal/relocations."""
+
+    subdomain: str
+    source_shard: str
+    target_shard: str
+    phase: str = "pending"  # pending, copy, catch_up, freeze, retire, done, failed
+    table: Optional[str] = None
+    rows: int = 0
+    bytes: int = 0
+    catch_up_rows: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    freeze_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    def snapshot(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "subdomain": self.subdomain,
+            "source_shard": self.source_shard,
+            "target_shard": self.target_shard,
+            "phase": self.phase,
+            "table": self.table,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "catch_up_rows": self.catch_up_rows,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else 0.0,
+            "bytes_per_second": round(self.bytes / elapsed, 1) if elapsed else 0.0,
+            "freeze_seconds": self.freeze_seconds,
+            "error": self.error,
+        }
+
+
+# Relocations started in this process, by subdomain
+relocations: Dict[str, RelocationProgress] = {}
+_relocation_tasks: Set[asyncio.Task] = set()
+
+
+class TenantRelocator:
+    """
+    Moves one tenant schema to another shard while the tenant stays online.
+
+    1. Start logging the id of every row written on the source (a trigger
+       per table), bootstrap the schema on the target and COPY every table
+       across from a single repeatable-read snapshot of the source.
+    2. Replay the logged changes (upsert rows still on the source, delete
+       the others) until a pass finds fewer than
+       TENANT_RELOCATION_CATCHUP_ROWS.
+    3. Freeze writes for this tenant only by taking EXCLUSIVE locks on its
+       source tables (reads keep working), then replay what is left.
+    4. Point public.tenants at the target and swap the logging triggers
+       for ones that reject writes before releasing the locks, so writers
+       still routed to the old shard fail instead of writing to it. Cached
+       engines and directory entries in this process are invalidated.
+    5. Other processes pick the move up when their tenant directory entry
+       expires, reading the frozen old schema until then. After
+       TENANT_CACHE_TTL the old schema is renamed out of the way.
+    """
+
+    def __init__(self, tenant: TenantRecord, target_shard: str):
+        self.tenant = tenant
+        self.schema = tenant.schema_name
+        self.target_shard = target_shard
+        self.progress = RelocationProgress(
+            subdomain=tenant.subdomain, source_shard=tenant.shard_id, target_shard=target_shard
+        )
+
+        # Target layout; also used to read the source, which has the same tables
+        metadata, _ = SchemaFactory(
+            self.schema, public_foreign_keys=hosts_public_schema(target_shard)
+        ).clone()
+        self.tables: List[Table] = [t for t in metadata.sorted_tables if t.schema == self.schema]
+
+    @property
+    def moved(self) -> bool:
+        """True once public.tenants points at the target shard."""
+        return self.progress.phase in ("retire", "done")
+
+    async def run(self) -> RelocationProgress:
+        if self.tenant.shard_id == self.target_shard:
+            raise ValueError(f"Tenant '{self.tenant.subdomain}' is already on shard '{self.target_shard}'")
+
+        source = create_async_engine(shard_url(self.tenant.shard_id), poolclass=NullPool)
+        try:
+            async with TenantBootstrapper.for_shard(self.target_shard) as bootstrapper:
+                if await bootstrapper.schema_exists(self.schema):
+                    raise ValueError(f"Schema '{self.schema}' already exists on shard '{self.target_shard}'")
+
+                await bootstrapper.create_schema_and_tables(self.schema)
+                try:
+                    await self._log_changes(source)
+                    await self._relocate(source, bootstrapper.engine)
+                except BaseException:
+                    if not self.moved:
+                        await self._stop_logging_changes(source)
+                        await self._drop_target_schema(bootstrapper.engine)
+                    raise
+
+            # Step 5: the target is live; retire the source once nobody routes to it
+            await asyncio.sleep(settings.TENANT_CACHE_TTL)
+            await self._retire_source(source)
+            self.progress.phase = "done"
+        except BaseException as e:
+            # After the flip the tenant has moved even if retiring the old schema failed
+            self.progress.phase = "done" if self.moved else "failed"
+            self.progress.error = str(e) or type(e).__name__
+            logger.error(f"Relocation of '{self.tenant.subdomain}' failed: {self.progress.error}")
+            raise
+        finally:
+            self.progress.finished_at = time.monotonic()
+            await source.dispose()
+
+        return self.progress
+
+    async def _relocate(self, source: AsyncEngine, target: AsyncEngine) -> None:
+        # Step 1: bulk copy
+        self.progress.phase = "copy"
+        await self._copy_snapshot(source, target)
+        self._log("copied")
+
+        # Step 2: catch up until the remaining delta is small
+        self.progress.phase = "catch_up"
+        for _ in range(settings.TENANT_RELOCATION_MAX_CATCHUP_PASSES):
+            # dst commits before src, so a failed pass leaves the change log intact
+            async with source.begin() as src, target.begin() as dst:
+                changed = await self._replay_changes(src, dst)
+            self._log(f"caught up {changed} change(s)")
+            if changed < settings.TENANT_RELOCATION_CATCHUP_ROWS:
+                break
+
+        # Steps 3 and 4: freeze, final sync, flip
+        self.progress.phase = "freeze"
+        frozen_at = time.monotonic()
+        try:
+            async with source.connect() as src:
+                async with src.begin():
+                    await src.exec_driver_sql(
+                        f"SET LOCAL lock_timeout = {settings.TENANT_RELOCATION_LOCK_TIMEOUT_MS}"
+                    )
+                    for table in self.tables:
+                        await src.exec_driver_sql(
+                            f'LOCK TABLE "{self.schema}"."{table.name}" IN EXCLUSIVE MODE'
+                        )
+
+                    async with target.begin() as dst:
+                        await self._replay_changes(src, dst)
+
+                    # Part of the freeze transaction: a failed flip keeps the change log
+                    await self._reject_writes(src)
+                    await self._flip_shard()
+                    self.progress.phase = "retire"
+        finally:
+            self.progress.freeze_seconds = round(time.monotonic() - frozen_at, 3)
+            if self.moved:
+                await tenant_engines.pop(self.schema)
+
+        self._log(f"moved; writes were frozen for {self.progress.freeze_seconds}s")
+
+    async def _copy_snapshot(self, source: AsyncEngine, target: AsyncEngine) -> None:
+        async with source.connect() as src, target.connect() as dst:
+            src_raw = (await src.get_raw_connection()).driver_connection
+            dst_raw = (await dst.get_raw_connection()).driver_connection
+
+            async with src_raw.transaction(isolation="repeatable_read", readonly=True):
+                async with dst_raw.transaction():
+                    for table in self.tables:
+                        await self._copy_table(src_raw, dst_raw, table)
+
+    async def _copy_table(self, src_raw, dst_raw, table: Table) -> None:
+        """Stream one table with COPY ... TO STDOUT piped into COPY ... FROM STDIN."""
+        self.progress.table = table.name
+        columns = [c.name for c in table.columns]
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=COPY_QUEUE_CHUNKS)
+
+        async def produce() -> None:
+            try:
+                await src_raw.copy_from_table(
+                    table.name, schema_name=self.schema, columns=columns, output=chunks.put
+                )
+            finally:
+                await chunks.put(None)
+
+        async def consume():
+            while (chunk := await chunks.get()) is not None:
+                self.progress.bytes += len(chunk)
+                yield chunk
+
+        producer = asyncio.create_task(produce())
+        try:
+            status = await dst_raw.copy_to_table(
+                table.name, schema_name=self.schema, columns=columns, source=consume()
+            )
+        finally:
+            if not producer.done():
+                producer.cancel()
+        await producer
+
+        self.progress.rows += int(status.split()[-1])
+
+    def _upsert(self, table: Table):
+        stmt = insert(table)
+        key = [c.name for c in table.primary_key.columns]
+        return stmt.on_conflict_do_update(
+            index_elements=key,
+            set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name not in key},
+        )
+
+    async def _log_changes(self, source: AsyncEngine) -> None:
+        """
+        Record the id of every row inserted, updated or deleted on the source
+        from now on, so catch-up and the freeze replay exactly what was written.
+        Installed before the snapshot, and CREATE TRIGGER waits for open write
+        transactions, so a write is either in the log or already in the copy.
+        """
+        async with source.begin() as src:
+            # CREATE TRIGGER briefly blocks writes; don't queue behind a long transaction
+            await src.exec_driver_sql(f"SET LOCAL lock_timeout = {settings.TENANT_RELOCATION_LOCK_TIMEOUT_MS}")
+            await src.exec_driver_sql(
+                f'CREATE TABLE "{self.schema}"."{CHANGE_LOG}" (table_name text NOT NULL, id uuid NOT NULL)'
+            )
+            await src.exec_driver_sql(f"""
+                CREATE FUNCTION "{self.schema}"."{CHANGE_TRIGGER}"() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP = 'DELETE' THEN
+                        INSERT INTO "{self.schema}"."{CHANGE_LOG}" VALUES (TG_TABLE_NAME, OLD.id);
+                    ELSE
+                        INSERT INTO "{self.schema}"."{CHANGE_LOG}" VALUES (TG_TABLE_NAME, NEW.id);
+                        IF TG_OP = 'UPDATE' THEN
+                            IF OLD.id <> NEW.id THEN
+                                INSERT INTO "{self.schema}"."{CHANGE_LOG}" VALUES (TG_TABLE_NAME, OLD.id);
+                            END IF;
+                        END IF;
+                    END IF;
+                    RETURN NULL;
+                END $$ LANGUAGE plpgsql
+            """)
+            for table in self.tables:
+                await src.exec_driver_sql(
+                    f'CREATE TRIGGER "{CHANGE_TRIGGER}" AFTER INSERT OR UPDATE OR DELETE '
+                    f'ON "{self.schema}"."{table.name}" '
+                    f'FOR EACH ROW EXECUTE FUNCTION "{self.schema}"."{CHANGE_TRIGGER}"()'
+                )
+
+    async def _replay_changes(self, src: AsyncConnection, dst: AsyncConnection) -> int:
+        """
+        Bring the target up to date with every logged row and take them off
+        the log; returns how many. Rows still on the source are upserted
+        (parents first), the others deleted (children first). The log
+        entries are only gone once ``src`` commits, which callers do after
+        ``dst``.
+        """
+        result = await src.exec_driver_sql(
+            f'DELETE FROM "{self.schema}"."{CHANGE_LOG}" RETURNING table_name, id'
+        )
+        logged: Dict[str, Set] = {}
+        for table_name, row_id in result:
+            logged.setdefault(table_name, set()).add(row_id)
+
+        present: Dict[str, List] = {}
+        for table in self.tables:
+            ids = list(logged.get(table.name, ()))
+            present[table.name] = []
+            for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+                batch = ids[start:start + UPSERT_BATCH_SIZE]
+                result = await src.execute(select(table.c.id).where(table.c.id.in_(batch)))
+                present[table.name] += result.scalars().all()
+
+        for table in reversed(self.tables):
+            gone = list(logged.get(table.name, set()).difference(present[table.name]))
+            for start in range(0, len(gone), UPSERT_BATCH_SIZE):
+                await dst.execute(delete(table).where(table.c.id.in_(gone[start:start + UPSERT_BATCH_SIZE])))
+
+        for table in self.tables:
+            self.progress.table = table.name
+            ids = present[table.name]
+            for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+                batch = ids[start:start + UPSERT_BATCH_SIZE]
+                rows = (await src.execute(select(table).where(table.c.id.in_(batch)))).mappings().all()
+                # A row deleted since it was looked up is back in the log for the next replay
+                if rows:
+                    await dst.execute(self._upsert(table), [dict(row) for row in rows])
+
+        replayed = sum(len(ids) for ids in logged.values())
+        self.progress.catch_up_rows += replayed
+        return replayed
+
+    async def _reject_writes(self, src: AsyncConnection) -> None:
+        """
+        Swap the change log for triggers that fail every write, in the freeze
+        transaction. Processes still routing here keep reading the old schema
+        until their directory entry expires, but cannot write to it.
+        """
+        await src.exec_driver_sql(f'DROP FUNCTION "{self.schema}"."{CHANGE_TRIGGER}"() CASCADE')
+        await src.exec_driver_sql(f'DROP TABLE "{self.schema}"."{CHANGE_LOG}"')
+        await src.exec_driver_sql(f"""
+            CREATE FUNCTION "{self.schema}"."{MOVED_TRIGGER}"() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'schema % has moved to another shard', TG_TABLE_SCHEMA
+                    USING ERRCODE = 'read_only_sql_transaction';
+            END $$ LANGUAGE plpgsql
+        """)
+        for table in self.tables:
+            await src.exec_driver_sql(
+                f'CREATE TRIGGER "{MOVED_TRIGGER}" BEFORE INSERT OR UPDATE OR DELETE OR TRUNCATE '
+                f'ON "{self.schema}"."{table.name}" '
+                f'FOR EACH STATEMENT EXECUTE FUNCTION "{self.schema}"."{MOVED_TRIGGER}"()'
+            )
+
+    async def _retire_source(self, source: AsyncEngine) -> None:
+        retired = f"{self.schema}__moved_{int(time.time())}"
+        async with source.begin() as src:
+            await src.exec_driver_sql(f'ALTER SCHEMA "{self.schema}" RENAME TO "{retired}"')
+        self._log(f"old schema retired as '{retired}'")
+
+    async def _stop_logging_changes(self, source: AsyncEngine) -> None:
+        try:
+            async with source.begin() as src:
+                # CASCADE takes the triggers with the function
+                await src.exec_driver_sql(f'DROP FUNCTION IF EXISTS "{self.schema}"."{CHANGE_TRIGGER}"() CASCADE')
+                await src.exec_driver_sql(f'DROP TABLE IF EXISTS "{self.schema}"."{CHANGE_LOG}"')
+        except Exception as e:
+            logger.error(f"Could not remove the change log from '{self.schema}' on '{self.tenant.shard_id}': {e}")
+
+    async def _flip_shard(self) -> None:
+        async with get_master_session() as session:
+            await session.execute(
+                update(Tenant)
+                .where(Tenant.id == self.tenant.id, Tenant.shard_id == self.tenant.shard_id)
+                .values(shard_id=self.target_shard)
+            )
+            await session.commit()
+
+        tenant_directory.invalidate(tenant_id=self.tenant.id, subdomain=self.tenant.subdomain)
+
+    async def _drop_target_schema(self, target: AsyncEngine) -> None:
+        try:
+            async with target.begin() as conn:
+                await conn.exec_driver_sql(f'DROP SCHEMA IF EXISTS "{self.schema}" CASCADE')
+        except Exception as e:
+            logger.error(f"Could not drop partial schema '{self.schema}' on '{self.target_shard}': {e}")
+
+    def _log(self, message: str) -> None:
+        stats = self.progress.snapshot()
+        logger.info(
+            f"Relocation '{self.tenant.subdomain}' -> '{self.target_shard}': {message} "
+            f"({stats['rows']} rows, {stats['bytes_per_second']} B/s)"
+        )
+
+
+async def start_relocation(subdomain: str, target_shard: str) -> RelocationProgress:
+    """Validate and start a relocation in the background; returns its progress."""
+    shard_url(target_shard)  # raises ValueError for an unknown shard
+
+    current = relocations.get(subdomain)
+    if current is not None and current.phase not in ("done", "failed"):
+        raise ValueError(f"Tenant '{subdomain}' is already being relocated")
+
+    tenant = await tenant_directory.resolve(subdomain)
+    if tenant is None:
+        raise LookupError(f"Tenant '{subdomain}' not found")
+    if tenant.database_ref:
+        raise ValueError(f"Tenant '{subdomain}' has a dedicated database and is not on a shard")
+    if tenant.shard_id == target_shard:
+        raise ValueError(f"Tenant '{subdomain}' is already on shard '{target_shard}'")
+
+    relocator = TenantRelocator(tenant, target_shard)
+    relocations[subdomain] = relocator.progress
+
+    task = asyncio.create_task(relocator.run())
+    _relocation_tasks.add(task)
+    task.add_done_callback(_relocation_finished)
+    return relocator.progress
+
+
+def _relocation_finished(task: asyncio.Task) -> None:
+    _relocation_tasks.discard(task)
+    # Errors are already recorded on the progress object
+    if not task.cancelled():
+        task.exception()
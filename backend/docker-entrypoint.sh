@@ -7,6 +7,9 @@ set -e
 
 # Run Alembic migrations
 alembic upgrade head
+# Tenant schemas on the default shard; other shards and dedicated databases
+# are migrated with: alembic -n tenant -x database=<shard> upgrade head
+alembic -n tenant upgrade head
 
 # Evaluating passed command:
 exec "$@"
\ No newline at end of file
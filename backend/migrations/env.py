@@ -26,6 +26,12 @@ from app.domains.school.models.tenant_permission import TenantPermission
 # Alembic configuration
 config = context.config
 database_url = str(settings.SQLALCHEMY_DATABASE_URI)
+
+# This chain is the master (public) schema only. Tenant schemas, on any
+# shard or dedicated database, have their own: alembic -n tenant (migrations/tenant).
+if context.get_x_argument(as_dictionary=True).get("database"):
+    raise SystemExit("-x database is for tenant migrations: alembic -n tenant -x database=<shard> ...")
+
 config.set_main_option("sqlalchemy.url", database_url)
 
 if config.config_file_name is not None:
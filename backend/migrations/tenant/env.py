@@ -0,0 +1,116 @@
+"""
+Migrations for tenant schemas, separate from the master (public) chain.
+
+    alembic -n tenant -x database=<shard> upgrade head
+    alembic -n tenant -x database=dedicated:<ref> upgrade head
+    alembic -n tenant -x schema=tenant_acme revision --autogenerate -m "..."
+
+Runs against one tenant database (a shard, "default" when omitted, or a
+dedicated database) and loops over the tenant schemas public.tenants
+places there, or the comma-separated -x schema list. Each schema keeps its
+own alembic_version table and is migrated in its own transaction with
+search_path set to it, so revisions use unqualified table names.
+"""
+
+import asyncio
+from logging.config import fileConfig
+from typing import List
+
+from alembic import context
+from sqlalchemy import MetaData, pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_engine_from_config
+
+# Registers the tenant models on APIBase.metadata
+import app.domains.auth.models  # noqa: F401
+import app.domains.school.models  # noqa: F401
+from app.db.base_class import APIBase
+from app.db.session import get_master_session
+from app.db.shards import DEFAULT_SHARD, shard_url
+from app.domains.school.repository.tenant import TenantRepository
+
+config = context.config
+x_arguments = context.get_x_argument(as_dictionary=True)
+target_database = x_arguments.get("database", DEFAULT_SHARD)
+config.set_main_option("sqlalchemy.url", shard_url(target_database))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Tenant tables are the schema-less ones; public tables belong to the master chain
+target_metadata = MetaData()
+for table in APIBase.metadata.tables.values():
+    if table.schema is None:
+        table.to_metadata(target_metadata)
+
+
+def requested_schemas() -> List[str]:
+    return [schema for schema in x_arguments.get("schema", "").split(",") if schema]
+
+
+async def tenant_schemas() -> List[str]:
+    schemas = requested_schemas()
+    if not schemas:
+        async with get_master_session() as session:
+            schemas = await TenantRepository(session).schema_names_on(target_database)
+    if getattr(config.cmd_opts, "autogenerate", False):
+        # One schema is enough to diff the models against
+        schemas = schemas[:1]
+    return schemas
+
+
+def configure(schema: str, **kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        version_table_schema=schema,
+        compare_type=True,
+        compare_server_default=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL for the -x schema list; there is no database to find schemas in."""
+    schemas = requested_schemas()
+    if not schemas:
+        raise SystemExit("Offline tenant migrations need -x schema=<schema>[,<schema>...]")
+
+    for schema in schemas:
+        configure(
+            schema,
+            url=config.get_main_option("sqlalchemy.url"),
+            literal_binds=True,
+            dialect_opts={"paramstyle": "named"},
+        )
+        with context.begin_transaction():
+            context.execute(f'SET search_path TO "{schema}"')
+            context.run_migrations()
+
+
+def run_migrations(connection: Connection, schema: str) -> None:
+    connection.exec_driver_sql(f'SET search_path TO "{schema}"')
+    configure(schema, connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    schemas = await tenant_schemas()
+    connectable = async_engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    try:
+        async with connectable.connect() as connection:
+            for schema in schemas:
+                await connection.run_sync(run_migrations, schema)
+                await connection.commit()
+    finally:
+        await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_async_migrations())
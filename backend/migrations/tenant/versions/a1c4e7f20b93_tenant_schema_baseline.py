@@ -0,0 +1,29 @@
+"""tenant_schema_baseline
+
+Revision ID: a1c4e7f20b93
+Revises: 
+Create Date: 2026-10-18 18:02:16.330912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e7f20b93'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tenant schemas up to here were created by TenantBootstrapper from the
+    # models; this revision only starts their version history.
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,30 @@
+"""add_tenant_shard_id
+
+Revision ID: 3b9f1c2d7e41
+Revises: c5ed6c57bf38
+Create Date: 2026-10-18 10:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f1c2d7e41'
+down_revision: Union[str, None] = 'c5ed6c57bf38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing tenants all live in SHARED_DB_URL, the "default" shard
+    op.add_column('tenants', sa.Column('shard_id', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False, server_default='default'), schema='public')
+    op.create_index(op.f('ix_public_tenants_shard_id'), 'tenants', ['shard_id'], unique=False, schema='public')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_public_tenants_shard_id'), table_name='tenants', schema='public')
+    op.drop_column('tenants', 'shard_id', schema='public')
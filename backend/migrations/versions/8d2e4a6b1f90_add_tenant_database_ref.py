@@ -0,0 +1,27 @@
+"""add_tenant_database_ref
+
+Revision ID: 8d2e4a6b1f90
+Revises: 3b9f1c2d7e41
+Create Date: 2026-10-18 14:03:51.902417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4a6b1f90'
+down_revision: Union[str, None] = '3b9f1c2d7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tenants', sa.Column('database_ref', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True), schema='public')
+
+
+def downgrade() -> None:
+    op.drop_column('tenants', 'database_ref', schema='public')
@@ -0,0 +1,68 @@
+"""
+Shared fixtures. The suite runs without Postgres or Redis: engines connect
+lazily, tenants are primed into the tenant directory, and Redis is fakeredis.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config.settings import settings
+from app.db.session import tenant_directory
+from app.db.tenant_directory import TenantRecord
+from app.main import app as fastapi_app
+
+BASE_DOMAIN = "edutenant.localhost"
+
+
+def make_tenant(subdomain: str = "acme", billing_tier: str = "basic", **overrides) -> TenantRecord:
+    fields = dict(
+        id=uuid.uuid4(),
+        subdomain=subdomain,
+        schema_name=f"tenant_{subdomain}",
+        is_active=True,
+        billing_tier=billing_tier,
+        shard_id="default",
+    )
+    fields.update(overrides)
+    return TenantRecord(**fields)
+
+
+@pytest.fixture
+def app():
+    return fastapi_app
+
+
+@pytest.fixture
+async def client(app):
+    # No lifespan: startup would create tables on a real database
+    async with AsyncClient(transport=ASGITransport(app=app), base_url=f"http://api.{BASE_DOMAIN}") as client:
+        yield client
+
+
+@pytest.fixture
+def tenant():
+    record = make_tenant()
+    tenant_directory.prime(record)
+    yield record
+    tenant_directory.clear()
+
+
+@pytest.fixture
+async def database_url():
+    """MASTER_DB_URL for benchmarks that need a real Postgres; skips when it is not reachable."""
+    url = str(settings.MASTER_DB_URL)
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            await asyncio.wait_for(conn.execute(text("SELECT 1")), 2)
+    except Exception as e:
+        pytest.skip(f"Postgres not reachable: {e}")
+    finally:
+        await engine.dispose()
+    return url
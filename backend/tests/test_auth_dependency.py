@@ -0,0 +1,189 @@
+"""
+Token verification cost: one decode per token, not per request.
+"""
+
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+import app.db.redis as blocklist
+import app.db.session as db_session
+import app.domains.auth.services.token as token_module
+from app.db.revocation_filter import RevocationFilter
+from app.utils import security
+from app.utils.auth_dep import AccessTokenBearer
+from app.utils.errors import register_all_errors
+from app.utils.security import Security, VerifiedClaimsCache
+
+routes = FastAPI()
+register_all_errors(routes)
+
+
+@routes.get("/me")
+async def me(token_data: dict = Depends(AccessTokenBearer())):
+    return {"jti": token_data["jti"]}
+
+
+@pytest.fixture
+def claims_cache(monkeypatch):
+    cache = VerifiedClaimsCache(max_size=100, ttl=300)
+    monkeypatch.setattr(security, "verified_claims", cache)
+    return cache
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Counts full JWT verifications."""
+    calls = []
+    decode = security.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    return calls
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    # In sync with Redis and nothing revoked: answered without any I/O
+    local = RevocationFilter(max_size=100)
+    local.ready = True
+    local.clear_redis_behind(local.behind_mark())
+    monkeypatch.setattr(token_module, "revocation_filter", local)
+    monkeypatch.setattr(blocklist, "revocation_filter", local)
+    return local
+
+
+@pytest.fixture
+async def client(claims_cache, revocations):
+    async with AsyncClient(transport=ASGITransport(app=routes), base_url="http://test") as client:
+        yield client
+
+
+def access_token(**overrides) -> str:
+    user = {"user_id": "42", "email": "ada@example.com", "tenant": None, **overrides}
+    return Security.create_access_token(user)
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def test_each_token_is_verified_once(client, claims_cache, decodes):
+    token = access_token()
+
+    responses = [await client.get("/me", headers=bearer(token)) for _ in range(10)]
+
+    assert {r.status_code for r in responses} == {200}
+    assert len(decodes) == 1
+    assert claims_cache.stats()["hits"] == 9
+
+
+async def test_cached_token_is_still_checked_against_the_blocklist(client, revocations):
+    token = access_token()
+    jti = (await client.get("/me", headers=bearer(token))).json()["jti"]
+
+    revocations.add(blocklist.blocklist_key(jti), time.time() + 600)
+
+    assert (await client.get("/me", headers=bearer(token))).status_code == 401
+
+
+class BlocklistSession:
+    """Master session answering the Postgres blocklist lookup."""
+
+    def __init__(self, blocked: bool):
+        self.blocked = blocked
+        self.queries = []
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def execute(self, stmt):
+        self.queries.append(stmt)
+        return type("Result", (), {"scalar_one_or_none": lambda _: object() if self.blocked else None})()
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("blocked, status", [(False, 200), (True, 401)])
+async def test_blocklist_fallback_opens_its_own_session_outside_the_middleware(
+    client, revocations, monkeypatch, blocked, status
+):
+    # Redis is behind, so the check goes to Postgres; no middleware has opened a session
+    revocations.mark_redis_behind()
+    sessions = []
+
+    def new_session(**kwargs):
+        sessions.append(BlocklistSession(blocked))
+        return sessions[-1]
+
+    monkeypatch.setattr(db_session, "MasterAsyncSessionLocal", new_session)
+
+    response = await client.get("/me", headers=bearer(access_token()))
+
+    assert response.status_code == status
+    [session] = sessions
+    assert len(session.queries) == 1
+    assert session.closed
+
+
+async def test_bad_tokens_are_never_cached(client, claims_cache, decodes):
+    token = access_token()[:-4] + "AAAA"
+
+    for _ in range(3):
+        assert (await client.get("/me", headers=bearer(token))).status_code == 401
+
+    assert len(decodes) == 3
+    assert claims_cache.stats()["size"] == 0
+
+
+def test_entries_expire_with_the_token():
+    cache = VerifiedClaimsCache(max_size=10, ttl=300)
+    cache.put("expired", {"exp": time.time() - 1})
+    cache.put("live", {"exp": time.time() + 60})
+
+    assert cache.get("expired") is None
+    assert cache.get("live") is not None
+
+
+def test_cache_is_bounded_lru():
+    cache = VerifiedClaimsCache(max_size=2, ttl=300)
+    exp = time.time() + 60
+    cache.put("a", {"exp": exp})
+    cache.put("b", {"exp": exp})
+    cache.get("a")
+    cache.put("c", {"exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_cached_decode_is_cheaper_than_verification(claims_cache):
+    tokens = [Security.create_access_token({"user_id": str(i)}, timedelta(minutes=5)) for i in range(200)]
+    claims_cache.max_size = len(tokens)
+
+    started = time.perf_counter()
+    for token in tokens:
+        Security.decode_token(token)
+    verified = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for token in tokens:
+        Security.decode_token(token)
+    cached = time.perf_counter() - started
+
+    assert claims_cache.stats()["hits"] == len(tokens)
+    assert cached < verified / 2, f"verify {verified * 1e6 / len(tokens):.1f}us, cached {cached * 1e6 / len(tokens):.1f}us"
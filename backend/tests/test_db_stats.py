@@ -0,0 +1,68 @@
+import pytest
+
+from app.db.metrics import Histogram, InstrumentedAsyncQueuePool, metrics_for
+from app.db.session import clear_engine_cache, get_tenant_session_factory, master_async_engine
+from app.utils.auth_dep import SuperuserRequired
+
+
+@pytest.fixture
+async def superuser(app):
+    app.dependency_overrides[SuperuserRequired] = lambda: object()
+    yield
+    app.dependency_overrides.pop(SuperuserRequired, None)
+
+
+@pytest.fixture
+async def engines():
+    await clear_engine_cache()
+    yield
+    await clear_engine_cache()
+
+
+async def test_db_stats_requires_a_superuser(client):
+    response = await client.get("/api/v1/internal/db-stats")
+
+    assert response.status_code in (401, 403)
+
+
+async def test_db_stats_reports_every_engine(client, superuser, engines):
+    get_tenant_session_factory("tenant_acme", "basic")
+    get_tenant_session_factory("tenant_globex", "premium")
+
+    response = await client.get("/api/v1/internal/db-stats")
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert set(stats["engines"]["tenants"]) == {"tenant_acme", "tenant_globex"}
+    assert stats["engine_count"] == 3
+    assert stats["engines"]["master"]["pool"] == "InstrumentedAsyncQueuePool"
+    # Tenant pools are capped at the tier's concurrency limit
+    assert stats["engines"]["tenants"]["tenant_acme"]["size"] == 2
+    assert stats["engines"]["tenants"]["tenant_globex"]["size"] == 2
+    for family in ("master", "tenant"):
+        assert {"connects", "search_path_resets", "checkout_wait_seconds", "connect_latency_seconds"} <= set(
+            stats["metrics"][family]
+        )
+
+
+async def test_pool_metrics_survive_dispose():
+    pool = master_async_engine.sync_engine.pool
+    assert isinstance(pool, InstrumentedAsyncQueuePool)
+    metrics = pool.metrics
+
+    await master_async_engine.dispose()
+
+    assert master_async_engine.sync_engine.pool is not pool
+    assert master_async_engine.sync_engine.pool.metrics is metrics
+    assert metrics_for(master_async_engine.sync_engine) is metrics
+
+
+def test_histogram_buckets_count_their_own_range():
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for seconds in (0.001, 0.01, 0.05, 0.5, 2.0):
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_0.01": 2, "le_0.1": 1, "+Inf": 2}
+    assert snapshot["count"] == 5
+    assert snapshot["sum"] == pytest.approx(2.561)
@@ -0,0 +1,93 @@
+"""
+Login-storm load test: password hashing must not stall unrelated requests.
+"""
+
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils import security
+from app.utils.errors import PasswordHashingBusy
+from app.utils.security import PasswordHasher, Security, pwd_context
+
+PASSWORD = "correct horse battery staple"
+
+
+@pytest.fixture(scope="module")
+def password_hash():
+    return pwd_context.hash(PASSWORD)
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    hasher = PasswordHasher(workers=2, max_pending=16, queue_timeout=30)
+    monkeypatch.setattr(security, "password_hasher", hasher)
+    return hasher
+
+
+async def request_latencies(client, until: asyncio.Future) -> list:
+    """Time a cheap non-login request every few milliseconds until ``until`` resolves."""
+    latencies = []
+    while not until.done():
+        started = time.perf_counter()
+        response = await client.get("/api/v1/does-not-exist")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 404
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def test_other_requests_stay_fast_during_a_login_storm(client, hasher, password_hash):
+    started = time.perf_counter()
+    pwd_context.verify(PASSWORD, password_hash)
+    one_hash = time.perf_counter() - started
+
+    storm = asyncio.gather(*(Security.verify_password_async(PASSWORD, password_hash) for _ in range(6)))
+    latencies = await request_latencies(client, storm)
+
+    assert await storm == [True] * 6
+    assert len(latencies) > 10
+    # On the event loop every request would queue behind whole hashes
+    assert statistics.median(latencies) < one_hash / 10
+    assert statistics.quantiles(latencies, n=20)[-1] < one_hash / 4  # p95
+    assert hasher.stats()["run_seconds"]["count"] == 6
+
+
+async def test_full_queue_is_rejected_not_piled_up(hasher, password_hash, monkeypatch):
+    monkeypatch.setattr(hasher, "max_pending", 0)
+    monkeypatch.setattr(hasher, "queue_timeout", 0.01)
+
+    logins = [asyncio.create_task(hasher.verify(PASSWORD, password_hash)) for _ in range(3)]
+    results = await asyncio.gather(*logins, return_exceptions=True)
+
+    assert results.count(True) == 2
+    assert isinstance(results[2], PasswordHashingBusy)
+    assert hasher.rejections == 1
+
+
+async def test_cancelled_logins_do_not_grow_the_queue(hasher, password_hash, monkeypatch):
+    monkeypatch.setattr(hasher, "workers", 1)
+    monkeypatch.setattr(hasher, "max_pending", 1)
+    monkeypatch.setattr(hasher, "queue_timeout", 0.01)
+    monkeypatch.setattr(hasher, "_executor", ThreadPoolExecutor(max_workers=1))
+    bound = hasher.workers + hasher.max_pending
+
+    # Clients that disconnect right after submitting their password
+    depths = []
+    for _ in range(20):
+        login = asyncio.create_task(hasher.verify(PASSWORD, password_hash))
+        await asyncio.sleep(0.005)
+        login.cancel()
+        await asyncio.gather(login, return_exceptions=True)
+        depths.append(hasher.in_flight)
+        assert hasher._executor._work_queue.qsize() <= hasher.max_pending
+
+    assert max(depths) <= bound
+
+    # Abandoned hashes give their slots back once they are done
+    while hasher.in_flight:
+        await asyncio.sleep(0.01)
+    assert await hasher.verify(PASSWORD, password_hash)
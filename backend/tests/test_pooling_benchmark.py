@@ -0,0 +1,62 @@
+"""
+Pooled engines against NullPool: per-query latency including checkout.
+
+Needs the Postgres from MASTER_DB_URL and is skipped when it is not
+reachable. Percentiles are printed (pytest -s) as well as compared.
+"""
+
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.metrics import InstrumentedAsyncQueuePool
+
+QUERIES = 200
+CONCURRENCY = 10
+
+
+async def query_latencies(engine) -> list:
+    latencies = []
+    slots = asyncio.Semaphore(CONCURRENCY)
+
+    async def one_query():
+        async with slots:
+            started = time.perf_counter()
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one_query() for _ in range(QUERIES)))
+    return latencies
+
+
+def percentiles(latencies: list) -> tuple:
+    cuts = statistics.quantiles(latencies, n=100)
+    return cuts[49], cuts[98]
+
+
+async def test_pooling_cuts_query_latency(database_url):
+    unpooled = create_async_engine(database_url, poolclass=NullPool)
+    pooled = create_async_engine(
+        database_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=CONCURRENCY,
+        max_overflow=0,
+    )
+    try:
+        await query_latencies(pooled)  # open the pool's connections first
+        without = percentiles(await query_latencies(unpooled))
+        with_pool = percentiles(await query_latencies(pooled))
+    finally:
+        await unpooled.dispose()
+        await pooled.dispose()
+
+    print(
+        f"\nNullPool p50 {without[0] * 1000:.2f} ms, p99 {without[1] * 1000:.2f} ms; "
+        f"pooled p50 {with_pool[0] * 1000:.2f} ms, p99 {with_pool[1] * 1000:.2f} ms"
+    )
+    assert with_pool[0] < without[0]
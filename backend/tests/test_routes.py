@@ -0,0 +1,32 @@
+from tests.conftest import BASE_DOMAIN
+
+
+def route_paths(app) -> list:
+    return [getattr(route, "path", None) for route in app.router.routes]
+
+
+def route_keys(app) -> list:
+    return [
+        (route.path, tuple(sorted(getattr(route, "methods", None) or ())))
+        for route in app.router.routes
+    ]
+
+
+async def test_route_table_is_stable_across_requests(app, client, tenant):
+    before = route_paths(app)
+
+    for _ in range(50):
+        await client.get(
+            f"/api/v1/tenants/{tenant.subdomain}/does-not-exist",
+            headers={"host": f"{tenant.subdomain}.{BASE_DOMAIN}"},
+        )
+        await client.get("/api/v1/does-not-exist")
+
+    assert route_paths(app) == before
+
+
+def test_tenant_routes_are_mounted_once(app):
+    tenant_routes = [key for key in route_keys(app) if key[0].startswith("/api/v1/tenants/{tenant}/")]
+
+    assert tenant_routes, "tenant router is not mounted"
+    assert len(tenant_routes) == len(set(tenant_routes))
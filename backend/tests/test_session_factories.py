@@ -0,0 +1,132 @@
+"""
+Session factory reuse, and the memory 1k tenants cost on one worker.
+"""
+
+import asyncio
+import gc
+import logging
+import tracemalloc
+
+import pytest
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.settings import settings
+from app.db.session import (
+    clear_engine_cache,
+    get_tenant_engine,
+    get_tenant_session_factory,
+    new_tenant_session,
+    tenant_engines,
+    tenant_session_factories,
+)
+
+TENANTS = 1000
+TIERS = ("basic", "premium")
+
+
+@pytest.fixture(autouse=True)
+async def clean_caches():
+    await clear_engine_cache()
+    yield
+    await clear_engine_cache()
+
+
+@pytest.fixture
+def quiet_logs():
+    # Log records pytest captures per engine would count as retained memory
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+async def retained_bytes(work) -> int:
+    """
+    Bytes allocated by ``await work()`` that are still alive once evicted
+    engines have been disposed and garbage collected.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        await work()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def live_engines() -> int:
+    gc.collect()
+    return sum(isinstance(obj, Engine) for obj in gc.get_objects())
+
+
+async def serve_every_tenant(*prefixes: str) -> None:
+    """One request's session for each of TENANTS tenants per prefix."""
+    for prefix in prefixes:
+        for i in range(TENANTS):
+            new_tenant_session(f"{prefix}_{i}", TIERS[i % 2])
+            # Requests yield to the loop, which lets evicted engines be disposed
+            await asyncio.sleep(0)
+
+
+def test_factory_is_built_once_per_tenant_and_tier():
+    first = get_tenant_session_factory("tenant_acme", "basic")
+
+    assert get_tenant_session_factory("tenant_acme", "basic") is first
+    assert get_tenant_session_factory("tenant_acme", "premium") is not first
+    assert first.kw["bind"] is get_tenant_engine("tenant_acme")
+
+
+async def test_request_sessions_allocate_no_factories(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_ENGINE_MODE", "shared")
+    for tier in TIERS:
+        new_tenant_session("tenant_warm", tier)  # build the shared engine and factories
+
+    created = 0
+    init = async_sessionmaker.__init__
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal created
+        created += 1
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(async_sessionmaker, "__init__", counting_init)
+    for i in range(TENANTS):
+        async with new_tenant_session(f"tenant_{i}", TIERS[i % 2]) as session:
+            assert isinstance(session, AsyncSession)
+
+    # Building a sessionmaker per request was the old path
+    assert created == 0
+    assert len(tenant_session_factories) == len(TIERS)
+
+
+@pytest.mark.parametrize("mode", ["shared", "translate"])
+async def test_1k_tenants_share_engine_and_factories(monkeypatch, quiet_logs, mode):
+    monkeypatch.setattr(settings, "TENANT_ENGINE_MODE", mode)
+    # First pass builds the engine and factories and grows SQLAlchemy's registries
+    await serve_every_tenant("warm")
+
+    # Sessions are per request and released; nothing may stay behind per tenant
+    retained = await retained_bytes(lambda: serve_every_tenant("tenant"))
+
+    assert len(tenant_session_factories) == len(TIERS)
+    assert retained < 16 * 1024, f"{retained} bytes retained for {TENANTS} tenants"
+
+
+async def test_per_tenant_engines_are_bounded_by_the_cache(monkeypatch, quiet_logs):
+    monkeypatch.setattr(settings, "TENANT_ENGINE_MODE", "per_tenant")
+    cache_size = settings.TENANT_ENGINE_CACHE_SIZE
+
+    engines_before = live_engines()
+
+    # Memory is bounded by the cache size, not by how many tenants were served
+    one_k = await retained_bytes(lambda: serve_every_tenant("first"))
+    two_k = await retained_bytes(lambda: serve_every_tenant("second", "third"))
+
+    # Evicted engines are disposed and take their factories with them
+    assert len(tenant_engines) == cache_size
+    assert len(tenant_session_factories) == cache_size
+    assert live_engines() - engines_before == cache_size
+    assert two_k < one_k * 1.25, f"{one_k} bytes for {TENANTS} tenants, {two_k} for twice as many"
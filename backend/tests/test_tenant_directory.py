@@ -0,0 +1,89 @@
+import asyncio
+
+from app.db.tenant_directory import TenantDirectory
+from tests.conftest import make_tenant
+
+
+def directory(loader) -> TenantDirectory:
+    return TenantDirectory(loader, ttl=60, negative_ttl=10, max_size=100)
+
+
+async def test_concurrent_misses_share_one_lookup():
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader(identifier):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return make_tenant(identifier)
+
+    tenants = directory(loader)
+    lookups = [asyncio.create_task(tenants.resolve("acme")) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    records = await asyncio.gather(*lookups)
+    assert calls == 1
+    assert {r.subdomain for r in records} == {"acme"}
+
+
+async def test_waiters_survive_a_cancelled_leader():
+    started = asyncio.Event()
+    calls = 0
+
+    async def loader(identifier):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await asyncio.Event().wait()  # hangs until cancelled
+        return make_tenant(identifier)
+
+    tenants = directory(loader)
+    leader = asyncio.create_task(tenants.resolve("acme"))
+    await started.wait()
+    waiters = [asyncio.create_task(tenants.resolve("acme")) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    records = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+
+    assert leader.cancelled()
+    assert {r.subdomain for r in records} == {"acme"}
+    # One waiter took over the lookup; the others shared its result
+    assert calls == 2
+
+
+async def test_cancelled_waiter_does_not_cancel_the_lookup():
+    release = asyncio.Event()
+
+    async def loader(identifier):
+        await release.wait()
+        return make_tenant(identifier)
+
+    tenants = directory(loader)
+    leader = asyncio.create_task(tenants.resolve("acme"))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(tenants.resolve("acme"))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    release.set()
+
+    assert (await leader).subdomain == "acme"
+    assert waiter.cancelled()
+
+
+async def test_unknown_tenants_are_cached_negatively():
+    calls = 0
+
+    async def loader(identifier):
+        nonlocal calls
+        calls += 1
+        return None
+
+    tenants = directory(loader)
+    assert await tenants.resolve("nope") is None
+    assert await tenants.resolve("nope") is None
+    assert calls == 1
@@ -0,0 +1,187 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.config.settings import settings
+from app.db.session import statement_timeout_ms
+from app.db.tenant_quotas import TenantQuotas
+from app.domains.school.apis import tenant as tenant_api
+from app.middleware import tenant as tenant_middleware
+from app.middleware.tenant import TenantSubdomainMiddleware
+from app.utils.dependencies import request_timeout
+from tests.conftest import BASE_DOMAIN
+
+
+def middleware_client(app) -> AsyncClient:
+    wrapped = TenantSubdomainMiddleware(app, base_domain=BASE_DOMAIN, global_prefix="api")
+    return AsyncClient(transport=ASGITransport(app=wrapped), base_url=f"http://acme.{BASE_DOMAIN}")
+
+
+async def respond(send) -> None:
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+@pytest.fixture
+def quotas(monkeypatch):
+    quotas = TenantQuotas(limits_by_tier={}, default_limit=1, wait_timeout=5)
+    monkeypatch.setattr(tenant_middleware, "tenant_quotas", quotas)
+    return quotas
+
+
+async def test_deadline_starts_after_the_quota_slot(tenant, quotas):
+    budget = statement_timeout_ms(tenant.billing_tier) / 1000
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["remaining"] = scope["state"]["deadline"] - time.monotonic()
+        await respond(send)
+
+    async with middleware_client(app) as client:
+        async with quotas.acquire(tenant.schema_name, tenant.billing_tier):
+            request = asyncio.create_task(client.get("/"))
+            await asyncio.sleep(0.2)  # queued behind the held slot
+        response = await request
+
+    assert response.status_code == 204
+    assert seen["remaining"] > budget - 0.1
+
+
+class FakeSession:
+    def __init__(self, deadline=None, in_transaction=False):
+        self.info = {"deadline": deadline} if deadline is not None else {}
+        self.transaction_open = in_transaction
+        self.statements = []
+        self.rolled_back = False
+        self.closed = False
+
+    def in_transaction(self):
+        return self.transaction_open
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt))
+
+    async def rollback(self):
+        self.rolled_back = True
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("outcome", ["ok", "error", "cancelled"])
+async def test_sessions_are_closed_however_the_request_ends(tenant, quotas, monkeypatch, outcome):
+    tenant_session, master_session = FakeSession(), FakeSession()
+    monkeypatch.setattr(tenant_middleware, "new_tenant_session", lambda *args: tenant_session)
+    monkeypatch.setattr(tenant_middleware, "MasterAsyncSessionLocal", lambda **kw: master_session)
+
+    async def app(scope, receive, send):
+        # Touch both lazy sessions so they are actually opened
+        _ = scope["state"]["session"].session
+        _ = scope["state"]["master_session"].session
+        if outcome == "error":
+            raise RuntimeError("boom")
+        if outcome == "cancelled":
+            raise asyncio.CancelledError()
+        await respond(send)
+
+    middleware = TenantSubdomainMiddleware(app, base_domain=BASE_DOMAIN, global_prefix="api")
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"host", f"acme.{BASE_DOMAIN}".encode())],
+    }
+
+    async def send(message):
+        pass
+
+    if outcome == "ok":
+        await middleware(scope, None, send)
+    else:
+        with pytest.raises((RuntimeError, asyncio.CancelledError)):
+            await middleware(scope, None, send)
+
+    for session in (tenant_session, master_session):
+        assert session.closed
+        assert session.rolled_back == (outcome != "ok")
+
+
+@pytest.fixture
+def fake_sessions(monkeypatch):
+    """Every session the middleware creates, tenant and master."""
+    created = {"tenant": [], "master": []}
+
+    def new_tenant_session(schema_name, billing_tier, deadline, shard_id):
+        created["tenant"].append(FakeSession(deadline, in_transaction=True))
+        return created["tenant"][-1]
+
+    def new_master_session(info):
+        created["master"].append(FakeSession(info.get("deadline")))
+        return created["master"][-1]
+
+    monkeypatch.setattr(tenant_middleware, "new_tenant_session", new_tenant_session)
+    monkeypatch.setattr(tenant_middleware, "MasterAsyncSessionLocal", new_master_session)
+    return created
+
+
+def timeout_app(open_first: bool) -> FastAPI:
+    async def open_sessions(request: Request):
+        # What TokenBearer does before the route's own dependencies run
+        _ = request.state.session.session
+        _ = request.state.master_session.session
+
+    dependencies = [Depends(open_sessions)] if open_first else []
+    app = FastAPI()
+
+    @app.get("/report", dependencies=[*dependencies, Depends(request_timeout(60000))])
+    async def report(request: Request):
+        _ = request.state.session.session
+        _ = request.state.master_session.session
+
+    return app
+
+
+async def test_request_timeout_reaches_open_sessions_and_their_transaction(tenant, quotas, fake_sessions):
+    async with middleware_client(timeout_app(open_first=True)) as client:
+        response = await client.get("/report")
+
+    assert response.status_code == 200
+    [tenant_session], [master_session] = fake_sessions["tenant"], fake_sessions["master"]
+    for session in (tenant_session, master_session):
+        assert session.info["deadline"] - time.monotonic() > 59
+    # The tenant session was mid-transaction, its after_begin hook already ran
+    assert tenant_session.statements == ["SET LOCAL statement_timeout = 60000"]
+    assert master_session.statements == []
+
+
+async def test_request_timeout_applies_to_sessions_opened_later(tenant, quotas, fake_sessions):
+    async with middleware_client(timeout_app(open_first=False)) as client:
+        response = await client.get("/report")
+
+    assert response.status_code == 200
+    for session in fake_sessions["tenant"] + fake_sessions["master"]:
+        assert session.info["deadline"] - time.monotonic() > 59
+        assert session.statements == []
+
+
+async def test_tenant_creation_gets_the_provisioning_timeout(client, fake_sessions, monkeypatch):
+    seen = {}
+
+    class TenantService:
+        def __init__(self, session):
+            seen["deadline"] = session.info["deadline"]
+
+        async def create_tenant(self, tenant_data):
+            return tenant_data
+
+    monkeypatch.setattr(tenant_api, "TenantService", TenantService)
+    payload = {"schema_name": "tenant_acme", "subdomain": "acme", "is_active": True, "billing_tier": "basic"}
+
+    response = await client.post(f"{settings.API_V1_STR}/tenants/tenants/", json=payload)
+
+    assert response.status_code == 200
+    remaining = seen["deadline"] - time.monotonic()
+    assert statement_timeout_ms() / 1000 < remaining <= settings.TENANT_PROVISIONING_TIMEOUT_MS / 1000
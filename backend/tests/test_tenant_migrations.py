@@ -0,0 +1,97 @@
+"""
+Tenant schema migrations: their own chain and version table per schema,
+kept apart from the master (public) chain. Runs alembic offline (--sql),
+which needs no database.
+"""
+
+import io
+import logging.config
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, text
+
+from app.db.shards import dedicated_shard
+from app.db.tenant_migrations import stamp_tenant_schema, tenant_scripts
+from app.domains.school.repository.tenant import TenantRepository
+
+BACKEND = Path(__file__).resolve().parents[1]
+MASTER_HEAD = "5e7a9c3d2b18"  # head of the master (public) chain
+
+
+@pytest.fixture(autouse=True)
+def alembic_env(monkeypatch):
+    monkeypatch.chdir(BACKEND)
+    # env.py applies alembic.ini's logging setup, which would disable the app's loggers
+    monkeypatch.setattr(logging.config, "fileConfig", lambda *args, **kwargs: None)
+
+
+def offline_sql(section: str, *x_arguments: str) -> str:
+    output = io.StringIO()
+    config = Config(str(BACKEND / "alembic.ini"), ini_section=section, output_buffer=output)
+    config.cmd_opts = Namespace(x=list(x_arguments), autogenerate=False)
+    command.upgrade(config, "head", sql=True)
+    return output.getvalue()
+
+
+def test_each_schema_gets_its_own_version_table():
+    sql = offline_sql("tenant", "database=default", "schema=tenant_acme,tenant_globex")
+    head = tenant_scripts().get_current_head()
+
+    for schema in ("tenant_acme", "tenant_globex"):
+        assert f'SET search_path TO "{schema}"' in sql
+        assert f"CREATE TABLE {schema}.alembic_version" in sql
+        assert f"INSERT INTO {schema}.alembic_version (version_num) VALUES ('{head}')" in sql
+
+    # Nothing from the master chain
+    assert "public.alembic_version" not in sql
+    assert "tenants" not in sql.replace("tenant_", "")
+    assert MASTER_HEAD not in sql
+
+
+def test_offline_tenant_migrations_need_schemas():
+    with pytest.raises(SystemExit):
+        offline_sql("tenant", "database=default")
+
+
+def test_new_schemas_are_stamped_at_the_tenant_head():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def attach_schema(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS tenant_acme")
+
+    with engine.begin() as conn:
+        stamp_tenant_schema(conn, "tenant_acme")
+        versions = conn.execute(text("SELECT version_num FROM tenant_acme.alembic_version")).scalars().all()
+
+    assert versions == [tenant_scripts().get_current_head()]
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return type("Result", (), {"scalars": lambda self: type("Scalars", (), {"all": lambda self: []})()})()
+
+
+@pytest.mark.parametrize(
+    "database, condition",
+    [
+        ("s2", "public.tenants.shard_id = :shard_id_1 AND public.tenants.database_ref IS NULL"),
+        (dedicated_shard("acme-db"), "public.tenants.database_ref = :database_ref_1"),
+    ],
+)
+async def test_schemas_are_found_by_the_database_they_live_in(database, condition):
+    session = RecordingSession()
+
+    await TenantRepository(session).schema_names_on(database)
+
+    [stmt] = session.statements
+    assert str(stmt.whereclause) == condition
+    assert set(stmt.compile().params.values()) == {database.removeprefix("dedicated:")}
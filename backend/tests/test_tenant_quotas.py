@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.db.tenant_quotas import TenantQuotas
+from app.utils.errors import TenantOverQuota
+
+
+@pytest.fixture
+def quotas():
+    return TenantQuotas(limits_by_tier={"basic": 1, "Premium": 3}, default_limit=2, wait_timeout=0.05)
+
+
+def test_limits_follow_the_billing_tier(quotas):
+    assert quotas.limit_for("basic") == 1
+    assert quotas.limit_for("PREMIUM") == 3
+    assert quotas.limit_for("trial") == 2
+    assert quotas.limit_for(None) == 2
+
+
+async def test_acquire_holds_a_slot_until_the_block_ends(quotas):
+    async with quotas.acquire("tenant_acme", "premium"):
+        async with quotas.acquire("tenant_acme", "premium"):
+            assert quotas.stats()["tenants"]["tenant_acme"] == {
+                "limit": 3,
+                "in_use": 2,
+                "waiting": 0,
+                "rejections": 0,
+            }
+        assert quotas.stats()["tenants"]["tenant_acme"]["in_use"] == 1
+
+    assert quotas.stats()["tenants"] == {}
+
+
+async def test_a_tenant_over_its_limit_is_rejected(quotas):
+    async with quotas.acquire("tenant_acme", "basic"):
+        with pytest.raises(TenantOverQuota):
+            async with quotas.acquire("tenant_acme", "basic"):
+                pass
+
+        # Other tenants have their own slots
+        async with quotas.acquire("tenant_globex", "basic"):
+            pass
+
+        assert quotas.stats()["tenants"]["tenant_acme"]["rejections"] == 1
+
+    assert quotas.stats() == {"rejections": 1, "tenants": {}}
+
+
+async def test_queued_requests_get_the_slot_in_arrival_order(quotas):
+    quotas.wait_timeout = 5
+    order = []
+
+    async def request(name):
+        async with quotas.acquire("tenant_acme", "basic"):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async with quotas.acquire("tenant_acme", "basic"):
+        tasks = [asyncio.create_task(request(name)) for name in ("first", "second", "third")]
+        await asyncio.sleep(0.01)
+        assert quotas.stats()["tenants"]["tenant_acme"]["waiting"] == 3
+
+    await asyncio.gather(*tasks)
+    assert order == ["first", "second", "third"]
+    assert quotas.stats()["tenants"] == {}
+
+
+async def test_cancelled_waiters_do_not_leave_an_entry_behind(quotas):
+    quotas.wait_timeout = 5
+
+    async with quotas.acquire("tenant_acme", "basic"):
+        waiter = asyncio.create_task(quotas.acquire("tenant_acme", "basic").__aenter__())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    assert quotas.stats()["tenants"] == {}
+
+
+async def test_tier_change_takes_effect_once_the_tenant_is_idle(quotas):
+    async with quotas.acquire("tenant_acme", "basic"):
+        # Upgraded mid-request: the tenant's current slots keep their size
+        with pytest.raises(TenantOverQuota):
+            async with quotas.acquire("tenant_acme", "premium"):
+                pass
+
+    async with quotas.acquire("tenant_acme", "premium"):
+        async with quotas.acquire("tenant_acme", "premium"):
+            async with quotas.acquire("tenant_acme", "premium"):
+                assert quotas.stats()["tenants"]["tenant_acme"]["limit"] == 3
+
+
+async def test_entries_do_not_outlive_their_requests(quotas):
+    for i in range(1000):
+        async with quotas.acquire(f"tenant_{i}", "basic"):
+            pass
+
+    assert quotas.stats()["tenants"] == {}
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+import pytest
+
+import app.db.redis as blocklist
+import app.domains.auth.services.token as token_module
+from app.config.settings import settings
+from app.db.revocation_filter import RevocationFilter
+from app.domains.auth.services.token import TokenService
+
+
+class InMemoryBlocklistRepository:
+    """Stands in for TokenBlocklistRepository (public.token_blocklist)."""
+
+    def __init__(self):
+        self.rows = []
+        self.lookups = 0
+
+    async def add_token_to_blocklist(self, jti, expires_at, user_id, tenant=None, is_tenant_user=False):
+        self.rows.append((jti, tenant, expires_at))
+
+    async def is_token_blocked(self, jti, tenant=None, expires_at=None):
+        self.lookups += 1
+        return any(row[0] == jti and row[1] == tenant for row in self.rows)
+
+    async def live_revocations(self):
+        return [row for row in self.rows if row[2] > datetime.now(timezone.utc)]
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis(monkeypatch, server):
+    client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(blocklist, "token_blocklist", client)
+    return client
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    local = RevocationFilter(max_size=1000)
+    monkeypatch.setattr(blocklist, "revocation_filter", local)
+    monkeypatch.setattr(token_module, "revocation_filter", local)
+    return local
+
+
+@pytest.fixture
+def repository():
+    return InMemoryBlocklistRepository()
+
+
+@pytest.fixture
+async def sync(monkeypatch, redis, revocations, repository):
+    """Run the revocation sync loop against fakeredis for the test's duration."""
+    monkeypatch.setattr(settings, "REDIS_RETRY_INTERVAL", 0.01)
+    task = asyncio.create_task(blocklist.run_revocation_sync(0.02, repository.live_revocations))
+    await wait_for(lambda: revocations.ready)
+    yield task
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.005)
+
+
+def expiry(seconds: int = 600) -> datetime:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).replace(microsecond=0)
+
+
+async def test_revocation_lives_until_token_expiry(redis, revocations):
+    await blocklist.add_jti_to_blocklist("jti-1", "acme", expiry(100))
+
+    assert 99 <= await redis.ttl(blocklist.blocklist_key("jti-1", "acme")) <= 101
+    assert await blocklist.token_in_blocklist("jti-1", "acme")
+    # Scoped like the token: another tenant, or a global token, is unaffected
+    assert not await blocklist.token_in_blocklist("jti-1", "other")
+    assert not await blocklist.token_in_blocklist("jti-1")
+
+
+async def test_synced_filter_answers_without_redis(sync, server, redis, revocations):
+    # Another process revokes a token
+    key = blocklist.blocklist_key("jti-2", "acme")
+    exp = time.time() + 600
+    await redis.set(key, str(exp), ex=600)
+    await redis.publish(blocklist.REVOCATION_CHANNEL, f"{exp} {key}")
+    await wait_for(lambda: revocations.revoked(key))
+
+    server.connected = False  # any network call would now fail
+    assert await blocklist.token_in_blocklist("jti-2", "acme")
+    assert not await blocklist.token_in_blocklist("never-revoked", "acme")
+
+
+async def test_revoke_survives_redis_outage_and_is_backfilled(sync, server, redis, revocations, repository):
+    service = TokenService(repository)
+    server.connected = False
+
+    # Logout still succeeds and the revocation is enforced from Postgres
+    await service.revoke_token("jti-3", expiry(), "user-1", "acme", is_tenant_user=True)
+    assert revocations.redis_behind
+    assert not await service.verify_token_not_blocklisted("jti-3", "acme")
+
+    # Once Redis is back the revocation is copied into it, and Redis answers again
+    server.connected = True
+    await wait_for(lambda: not revocations.redis_behind and revocations.ready)
+    assert await redis.exists(blocklist.blocklist_key("jti-3", "acme"))
+
+    lookups = repository.lookups
+    assert not await service.verify_token_not_blocklisted("jti-3", "acme")
+    assert await service.verify_token_not_blocklisted("jti-4", "acme")
+    assert repository.lookups == lookups
+
+
+async def test_failed_redis_check_falls_back_to_postgres(server, redis, revocations, repository):
+    revocations.redis_behind = False
+    repository.rows.append(("jti-5", None, expiry()))
+    server.connected = False
+
+    assert not await TokenService(repository).verify_token_not_blocklisted("jti-5")
+    assert revocations.redis_behind
+
+
+async def test_backfill_does_not_overwrite_existing_entries(redis, revocations):
+    key = blocklist.blocklist_key("jti-6", "acme")
+    await redis.set(key, "1", ex=600)
+
+    added = await blocklist.backfill_blocklist([
+        ("jti-6", "acme", expiry()),
+        ("jti-7", "acme", expiry()),
+        ("jti-8", "acme", expiry(-60)),  # already expired
+    ])
+
+    assert added == 1
+    assert await redis.get(key) == "1"
+    assert await redis.exists(blocklist.blocklist_key("jti-7", "acme"))
+    assert not await redis.exists(blocklist.blocklist_key("jti-8", "acme"))
+
+
+async def test_overflowing_filter_stays_subscribed_and_backs_off(monkeypatch, redis, revocations, repository):
+    monkeypatch.setattr(settings, "REDIS_RETRY_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "TOKEN_BLOCKLIST_RESCAN_MAX_INTERVAL", 0.08)
+    revocations.max_size = 2
+    for i in range(3):
+        await blocklist.add_jti_to_blocklist(f"jti-{i}", "acme", expiry())
+
+    scans, subscriptions = [], []
+    load = blocklist._load_revocations
+    pubsub = redis.pubsub
+
+    async def counting_load():
+        scans.append(time.monotonic())
+        return await load()
+
+    def counting_pubsub(**kwargs):
+        subscriptions.append(1)
+        return pubsub(**kwargs)
+
+    monkeypatch.setattr(blocklist, "_load_revocations", counting_load)
+    monkeypatch.setattr(redis, "pubsub", counting_pubsub)
+
+    task = asyncio.create_task(blocklist.run_revocation_sync(0.01, repository.live_revocations))
+    try:
+        await asyncio.sleep(0.4)
+        # "Ask Redis" mode: still correct, one subscription, rescans spaced out
+        assert not revocations.ready
+        assert await blocklist.token_in_blocklist("jti-0", "acme")
+        assert len(subscriptions) == 1
+        gaps = [later - earlier for earlier, later in zip(scans, scans[1:])]
+        assert 4 <= len(scans) <= 9
+        assert gaps[1] > gaps[0] * 1.5
+        assert max(gaps) < 0.08 * 1.5
+
+        # Once enough revocations have gone, the next rescan brings the filter back
+        await redis.delete(blocklist.blocklist_key("jti-0", "acme"))
+        await wait_for(lambda: revocations.ready)
+        assert revocations.revoked(blocklist.blocklist_key("jti-1", "acme"))
+        assert len(subscriptions) == 1
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
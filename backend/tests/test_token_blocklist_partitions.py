@@ -0,0 +1,238 @@
+"""
+public.token_blocklist partitioning, against an in-memory partitioned
+table: rows are routed to the daily partition for their UTC expiry, an
+expiry past the last partition gets one of its own (SQLSTATE 23514), and
+expired partitions are detached CONCURRENTLY and dropped.
+"""
+
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.domains.auth.repository import token_blocklist as repository_module
+from app.domains.auth.repository.token_blocklist import (
+    NO_PARTITION_SQLSTATE,
+    TokenBlocklistRepository,
+    partition_name,
+)
+
+TODAY = date(2026, 10, 18)
+# 23:30 UTC: already the next day east of UTC, still today to the west
+LATE_EXPIRY = datetime(2026, 10, 18, 23, 30, tzinfo=timezone.utc)
+
+
+class NoPartition(Exception):
+    sqlstate = NO_PARTITION_SQLSTATE
+
+
+class FakeResult(list):
+    def all(self):
+        return list(self)
+
+    def scalar_one_or_none(self):
+        return self[0] if self else None
+
+
+class PartitionedBlocklist:
+    """Daily partitions (name -> state) and the rows each one holds."""
+
+    def __init__(self, *days: date):
+        self.partitions = {partition_name(day): "attached" for day in days}
+        self.rows = {name: [] for name in self.partitions}
+        self.statements = []
+
+    def route(self, entry) -> None:
+        name = partition_name(entry.expires_at.date())
+        if self.partitions.get(name) != "attached":
+            raise IntegrityError("INSERT INTO public.token_blocklist", {}, NoPartition())
+        self.rows[name].append(entry)
+
+    def run(self, stmt, params=None) -> FakeResult:
+        sql = " ".join(str(stmt).split())
+        self.statements.append(sql)
+        if "FROM pg_class" in sql:
+            return FakeResult(sorted(self.partitions.items()))
+        if sql.startswith("CREATE TABLE"):
+            name = sql.split('"')[1]
+            self.partitions[name] = "detached"
+            self.rows[name] = []
+        elif "ATTACH PARTITION" in sql:
+            self.partitions[sql.split('"')[1]] = "attached"
+        elif "DETACH PARTITION" in sql:
+            self.partitions[sql.split('"')[1]] = "detached"
+        elif sql.startswith("DROP TABLE"):
+            del self.partitions[sql.split('"')[1]]
+        elif sql.startswith("SELECT public.token_blocklist"):
+            return self.lookup(stmt.compile().params)
+        return FakeResult()
+
+    def lookup(self, params) -> FakeResult:
+        low, high = params["expires_at_1"], params["expires_at_2"]
+        return FakeResult(
+            entry
+            for name, rows in self.rows.items()
+            if self.partitions[name] == "attached"
+            for entry in rows
+            if entry.jti == params["jti_1"] and low <= entry.expires_at <= high
+        )
+
+
+class FakeSession:
+    def __init__(self, table: PartitionedBlocklist):
+        self.table = table
+        self.pending = []
+        self.rollbacks = 0
+        self.bind = FakeBind(table)
+
+    def add(self, entry):
+        self.pending.append(entry)
+
+    async def commit(self):
+        pending, self.pending = self.pending, []
+        for entry in pending:
+            self.table.route(entry)
+
+    async def rollback(self):
+        self.pending = []
+        self.rollbacks += 1
+
+    async def execute(self, stmt, params=None):
+        return self.table.run(stmt, params)
+
+
+class FakeBind:
+    def __init__(self, table: PartitionedBlocklist):
+        self.table = table
+        self.locked = True
+        self.isolation_level = None
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, bind: FakeBind):
+        self.bind = bind
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def execution_options(self, isolation_level):
+        self.bind.isolation_level = isolation_level
+        return self
+
+    async def scalar(self, stmt, params=None):
+        self.bind.table.run(stmt, params)
+        return self.bind.locked
+
+    async def execute(self, stmt, params=None):
+        return self.bind.table.run(stmt, params)
+
+
+@pytest.fixture
+def local_time_zone(monkeypatch):
+    """Run the test as a server east of UTC would (UTC+14)."""
+    monkeypatch.setenv("TZ", "Pacific/Kiritimati")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def today(monkeypatch):
+    monkeypatch.setattr(repository_module, "_utc_today", lambda: TODAY)
+
+
+async def test_revocations_land_in_the_partition_for_their_utc_day(local_time_zone):
+    table = PartitionedBlocklist(TODAY, TODAY + timedelta(days=1))
+    repository = TokenBlocklistRepository(FakeSession(table))
+    # As auth_dep and the logout route turn the exp claim into a datetime
+    expires_at = datetime.fromtimestamp(LATE_EXPIRY.timestamp(), tz=timezone.utc)
+
+    await repository.add_token_to_blocklist("jti-1", expires_at, user_id="42")
+
+    [entry] = table.rows[partition_name(TODAY)]
+    assert entry.expires_at == datetime(2026, 10, 18, 23, 30)
+    assert await repository.is_token_blocked("jti-1", expires_at=expires_at)
+    assert not await repository.is_token_blocked("jti-2", expires_at=expires_at)
+
+
+async def test_lookup_tolerates_a_rounded_expiry():
+    table = PartitionedBlocklist(TODAY)
+    repository = TokenBlocklistRepository(FakeSession(table))
+    await repository.add_token_to_blocklist("jti-1", LATE_EXPIRY, user_id="42")
+
+    assert await repository.is_token_blocked("jti-1", expires_at=LATE_EXPIRY + timedelta(milliseconds=600))
+    assert not await repository.is_token_blocked("jti-1", expires_at=LATE_EXPIRY + timedelta(minutes=1))
+
+
+async def test_expiry_past_the_last_partition_gets_its_own(today):
+    table = PartitionedBlocklist(TODAY)
+    session = FakeSession(table)
+    far_future = LATE_EXPIRY + timedelta(days=30)
+
+    await TokenBlocklistRepository(session).add_token_to_blocklist("jti-1", far_future, user_id="42")
+
+    name = partition_name(far_future.date())
+    assert table.partitions[name] == "attached"
+    assert [entry.jti for entry in table.rows[name]] == ["jti-1"]
+    assert session.rollbacks == 1
+    # Serialised with maintenance, then created standalone and attached
+    lock, listing, create, attach = table.statements
+    assert lock.startswith("SELECT pg_advisory_xact_lock")
+    assert create.startswith(f'CREATE TABLE public."{name}"')
+    assert attach.startswith(f'ALTER TABLE public.token_blocklist ATTACH PARTITION public."{name}"')
+
+
+async def test_other_integrity_errors_are_not_retried():
+    class Duplicate(Exception):
+        sqlstate = "23505"
+
+    table = PartitionedBlocklist(TODAY)
+    session = FakeSession(table)
+
+    async def commit():
+        raise IntegrityError("INSERT INTO public.token_blocklist", {}, Duplicate())
+
+    session.commit = commit
+
+    with pytest.raises(IntegrityError):
+        await TokenBlocklistRepository(session).add_token_to_blocklist("jti-1", LATE_EXPIRY, user_id="42")
+    assert table.statements == []
+
+
+async def test_expired_partitions_are_detached_concurrently_and_dropped(today):
+    yesterday, two_days_ago, three_days_ago = (TODAY - timedelta(days=n) for n in (1, 2, 3))
+    table = PartitionedBlocklist(three_days_ago, two_days_ago, yesterday, TODAY)
+    table.partitions[partition_name(two_days_ago)] = "detach_pending"  # interrupted last time
+    table.partitions[partition_name(three_days_ago)] = "detached"  # detached, drop failed
+    session = FakeSession(table)
+
+    dropped = await TokenBlocklistRepository(session).cleanup_expired_tokens()
+
+    assert dropped == 3
+    assert list(table.partitions) == [partition_name(TODAY)]
+    # DETACH ... CONCURRENTLY cannot run in a transaction block
+    assert session.bind.isolation_level == "AUTOCOMMIT"
+    detaches = [sql for sql in table.statements if "DETACH PARTITION" in sql]
+    assert detaches == [
+        f'ALTER TABLE public.token_blocklist DETACH PARTITION public."{partition_name(two_days_ago)}" FINALIZE',
+        f'ALTER TABLE public.token_blocklist DETACH PARTITION public."{partition_name(yesterday)}" CONCURRENTLY',
+    ]
+    assert table.statements[-1].startswith("SELECT pg_advisory_unlock")
+
+
+async def test_purge_skips_when_another_process_holds_the_lock(today):
+    table = PartitionedBlocklist(TODAY - timedelta(days=1), TODAY)
+    session = FakeSession(table)
+    session.bind.locked = False
+
+    assert await TokenBlocklistRepository(session).cleanup_expired_tokens() == 0
+    assert len(table.partitions) == 2
+    assert [sql for sql in table.statements if "PARTITION" in sql or "DROP" in sql] == []
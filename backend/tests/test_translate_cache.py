@@ -0,0 +1,171 @@
+"""
+Compiled-statement cache hit rate and memory at 1k tenants, by the way
+tenant SQL reaches the database:
+
+- per_tenant: unqualified SQL under search_path, one engine (and so one
+  compiled cache) per tenant.
+- shared: unqualified SQL under SET LOCAL search_path, one shared engine.
+- translate: unqualified SQL compiled once with a schema placeholder that
+  schema_translate_map fills in at execution time, one shared engine.
+
+Statements are compiled as Connection.execute compiles them, against caches
+of the engine's default size. Translate mode also replaces the per-schema
+MetaData copy SchemaFactory builds; its cost is measured on a sample of
+clones. Results are printed (pytest -s) as well as compared.
+"""
+
+import gc
+import logging
+import random
+import tracemalloc
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.util import LRUCache
+
+import app.domains.auth.models  # noqa: F401  (registers the tenant tables)
+import app.domains.school.models  # noqa: F401
+from app.db.base_class import APIBase
+from app.utils.schema_utils import SchemaFactory
+
+TENANTS = 1000
+REQUESTS = 10000
+CACHE_SIZE = 500  # create_async_engine's query_cache_size default
+DIALECT = postgresql.asyncpg.dialect()
+MODES = ("per_tenant", "shared", "translate")
+HOT_TABLES = ("tenant_users", "students", "schools")
+CLONE_SAMPLE = 20  # SchemaFactory clones are slow; their cost is per tenant
+
+
+@pytest.fixture(autouse=True)
+def quiet_logs():
+    # SchemaFactory warns about cross-schema foreign keys for every clone
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def hot_statements(tables) -> list:
+    """Tenant-side hot queries, built per request as the repositories build them."""
+    users, students, schools = (tables[name] for name in HOT_TABLES)
+    return [
+        select(users).where(users.c.email == "ada@example.com"),
+        select(students).where(students.c.full_name.ilike("%ada%")),
+        select(schools).limit(10),
+    ]
+
+
+def tenant_traffic(seed: int = 0) -> list:
+    """REQUESTS tenant schemas, a few busy schools and a long tail; every tenant shows up."""
+    rng = random.Random(seed)
+    tenants = [f"tenant_{i}" for i in range(TENANTS)]
+    busy = rng.choices(tenants, weights=[1 / (rank + 1) for rank in range(TENANTS)], k=REQUESTS - TENANTS)
+    return rng.sample(tenants + busy, REQUESTS)
+
+
+def compile_cached(stmt, cache: LRUCache, schema_translate_map=None) -> CacheStats:
+    """The compile step of Connection.execute; returns whether the cache answered."""
+    _, _, cache_hit = stmt._compile_w_cache(
+        DIALECT,
+        compiled_cache=cache,
+        column_keys=[],
+        for_executemany=False,
+        schema_translate_map=schema_translate_map,
+    )
+    return cache_hit
+
+
+class Worker:
+    """One process's compiled caches under a given mode."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.shared = LRUCache(CACHE_SIZE)
+        self.caches = {}  # per_tenant: one per engine
+
+    def serve(self, schema: str) -> int:
+        """Run one request's hot statements; returns how many were cache hits."""
+        cache, translate = self.shared, None
+        if self.mode == "per_tenant":
+            cache = self.caches.setdefault(schema, LRUCache(CACHE_SIZE))
+        elif self.mode == "translate":
+            translate = {None: schema}
+
+        statements = hot_statements(APIBase.metadata.tables)
+        return sum(compile_cached(stmt, cache, translate) == CacheStats.CACHE_HIT for stmt in statements)
+
+    def cached_statements(self) -> int:
+        return sum(len(cache) for cache in self.caches.values()) or len(self.shared)
+
+
+def retained_bytes(work) -> int:
+    """Bytes allocated by ``work()`` that are still alive afterwards."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        work()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def measure(mode: str) -> dict:
+    # Memory: what the caches hold once every tenant has been served
+    worker = Worker(mode)
+    retained = retained_bytes(lambda: [worker.serve(f"tenant_{i}") for i in range(TENANTS)])
+
+    # Hit rate: steady traffic on a fresh worker
+    worker = Worker(mode)
+    traffic = tenant_traffic()
+    hits = sum(worker.serve(schema) for schema in traffic)
+    return {
+        "hit_rate": hits / (len(traffic) * len(HOT_TABLES)),
+        "entries": worker.cached_statements(),
+        "retained": retained,
+    }
+
+
+def test_translated_statements_render_each_tenants_schema():
+    stmt = hot_statements(APIBase.metadata.tables)[0]
+    cache = LRUCache(CACHE_SIZE)
+
+    assert compile_cached(stmt, cache, {None: "tenant_1"}) == CacheStats.CACHE_MISS
+    assert compile_cached(stmt, cache, {None: "tenant_2"}) == CacheStats.CACHE_HIT
+
+    [compiled] = cache.values()
+    for schema in ("tenant_1", "tenant_2"):
+        sql = compiled.preparer._render_schema_translates(compiled.string, {None: schema})
+        assert f"FROM {schema}.tenant_users" in sql
+
+
+def test_translate_mode_cache_hit_rate_and_memory_at_1k_tenants():
+    results = {mode: measure(mode) for mode in MODES}
+    clones = []
+    clone_bytes = retained_bytes(
+        lambda: clones.extend(SchemaFactory(f"tenant_{i}").clone() for i in range(CLONE_SAMPLE))
+    )
+
+    print(f"\n{TENANTS} tenants, {REQUESTS} requests, compiled cache size {CACHE_SIZE}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<10} hit rate {result['hit_rate']:.1%}, {result['entries']} cached statements, "
+            f"{result['retained'] / 1024:.0f} KiB retained"
+        )
+    print(f"SchemaFactory clones: {clone_bytes / CLONE_SAMPLE / 1024:.0f} KiB per tenant")
+
+    translate, per_tenant = results["translate"], results["per_tenant"]
+    # One compiled form per statement, whichever tenant runs it
+    assert translate["entries"] == len(HOT_TABLES)
+    assert translate["hit_rate"] > 0.99
+    assert translate["hit_rate"] == results["shared"]["hit_rate"]
+    # An engine per tenant compiles every statement once per tenant
+    assert per_tenant["entries"] == TENANTS * len(HOT_TABLES)
+    assert per_tenant["hit_rate"] < translate["hit_rate"]
+    assert translate["retained"] * 10 < per_tenant["retained"]
+    # The metadata copy translate mode no longer needs outweighs its whole cache
+    assert translate["retained"] < clone_bytes / CLONE_SAMPLE
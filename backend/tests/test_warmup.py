@@ -0,0 +1,171 @@
+"""
+Startup warm-up: which tenants are picked, and that one tenant failing, a
+slow tenant or an unreachable master DB never holds up or breaks startup.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.db import warmup
+from app.db.session import tenant_directory
+from app.db.shards import dedicated_shard
+from app.domains.school.models.tenant import Tenant
+from tests.conftest import make_tenant
+
+
+class FakeResult(list):
+    def scalars(self):
+        return self
+
+    def all(self):
+        return list(self)
+
+
+class RecordingSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+        self.rollbacks = 0
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.rows)
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture(autouse=True)
+def clean_directory():
+    yield
+    tenant_directory.clear()
+
+
+@pytest.fixture
+def tenants(monkeypatch):
+    """Five active tenants returned by the master DB."""
+    records = [make_tenant(f"school{i}") for i in range(5)]
+
+    async def load_active_tenants(limit):
+        return records[:limit]
+
+    monkeypatch.setattr(warmup, "load_active_tenants", load_active_tenants)
+    return records
+
+
+async def test_most_recently_updated_active_tenants_are_selected(monkeypatch):
+    session = RecordingSession([Tenant(schema_name="tenant_acme", subdomain="acme", billing_tier="premium")])
+
+    @asynccontextmanager
+    async def get_master_session():
+        yield session
+
+    monkeypatch.setattr(warmup, "get_master_session", get_master_session)
+
+    [record] = await warmup.load_active_tenants(limit=20)
+
+    [stmt] = session.statements
+    assert str(stmt.whereclause) == "public.tenants.is_active = true"
+    assert [str(clause) for clause in stmt._order_by_clauses] == ["public.tenants.updated_date DESC"]
+    assert stmt._limit == 20
+    assert (record.schema_name, record.billing_tier) == ("tenant_acme", "premium")
+
+
+async def test_warm_up_opens_the_tenants_engine_and_runs_hot_statements(monkeypatch):
+    tenant = make_tenant("acme", "premium", shard_id="s2", database_ref="acme-db")
+    session = RecordingSession()
+    opened = []
+
+    @asynccontextmanager
+    async def get_tenant_session(schema_name, billing_tier=None, deadline=None, shard_id=None):
+        opened.append((schema_name, billing_tier, shard_id))
+        yield session
+
+    monkeypatch.setattr(warmup, "get_tenant_session", get_tenant_session)
+
+    await warmup.warm_up_tenant(tenant)
+
+    # On the engine requests for this tenant will use
+    assert opened == [("tenant_acme", "premium", dedicated_shard("acme-db"))]
+    assert [str(stmt) for stmt in session.statements] == [str(stmt) for stmt in warmup.hot_statements()]
+    # Nothing is left open or written
+    assert session.rollbacks == 1
+    # First requests resolve the tenant without a master DB query
+    assert await tenant_directory.resolve("acme") == tenant
+    assert await tenant_directory.resolve(str(tenant.id)) == tenant
+
+
+async def test_a_failing_tenant_does_not_stop_the_others(monkeypatch, tenants, caplog):
+    warmed = []
+
+    async def warm_up_tenant(tenant):
+        if tenant.subdomain == "school2":
+            raise ConnectionRefusedError("shard down")
+        warmed.append(tenant.subdomain)
+
+    monkeypatch.setattr(warmup, "warm_up_tenant", warm_up_tenant)
+
+    with caplog.at_level(logging.WARNING, logger=warmup.__name__):
+        count = await warmup.warm_up_tenants(limit=5, concurrency=2, timeout=5)
+
+    assert count == 4
+    assert sorted(warmed) == ["school0", "school1", "school3", "school4"]
+    assert "Warm-up failed for tenant 'school2': shard down" in caplog.text
+
+
+async def test_at_most_concurrency_tenants_warm_at_once(monkeypatch, tenants):
+    running = peak = 0
+
+    async def warm_up_tenant(tenant):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    monkeypatch.setattr(warmup, "warm_up_tenant", warm_up_tenant)
+
+    assert await warmup.warm_up_tenants(limit=5, concurrency=2, timeout=5) == 5
+    assert peak == 2
+
+
+async def test_limit_caps_how_many_tenants_are_warmed(monkeypatch, tenants):
+    async def warm_up_tenant(tenant):
+        pass
+
+    monkeypatch.setattr(warmup, "warm_up_tenant", warm_up_tenant)
+
+    assert await warmup.warm_up_tenants(limit=3, concurrency=4, timeout=5) == 3
+
+
+async def test_startup_does_not_wait_past_the_timeout(monkeypatch, tenants, caplog):
+    async def warm_up_tenant(tenant):
+        if tenant.subdomain == "school4":
+            await asyncio.Event().wait()  # a shard that never answers
+
+    monkeypatch.setattr(warmup, "warm_up_tenant", warm_up_tenant)
+
+    started = time.monotonic()
+    with caplog.at_level(logging.WARNING, logger=warmup.__name__):
+        count = await warmup.warm_up_tenants(limit=5, concurrency=5, timeout=0.05)
+
+    assert time.monotonic() - started < 1
+    # Tenants that finished in time still count
+    assert count == 4
+    assert "Tenant warm-up stopped after 0.05s" in caplog.text
+
+
+async def test_unreachable_master_db_skips_warm_up(monkeypatch, caplog):
+    async def load_active_tenants(limit):
+        raise ConnectionRefusedError("master down")
+
+    monkeypatch.setattr(warmup, "load_active_tenants", load_active_tenants)
+
+    with caplog.at_level(logging.WARNING, logger=warmup.__name__):
+        assert await warmup.warm_up_tenants(limit=5, concurrency=2, timeout=5) == 0
+
+    assert "Tenant warm-up skipped: master down" in caplog.text